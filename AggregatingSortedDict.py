@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+
+"""A SortedDict that aggregates the values of any range of keys quickly
+
+Besides the dictionary itself an AggregatingSortedDict keeps its values
+in key order in blocks of up to 2 * _LOAD, with a segment tree over the
+blocks' aggregates and another over their lengths. Positions come from
+the key index SortedDict keeps: the tree of lengths finds the block and
+offset of any index position, so aggregate() combines the partial blocks
+at either end of a key range with the tree's answer for the whole blocks
+between them, and setting, adding or removing an item only recomputes
+one block and its path in the trees.
+
+Values are combined with op, which must be associative and have the
+given identity; "sum", "min" and "max" name the usual ones.
+
+>>> d = AggregatingSortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+>>> d.aggregate(), d.aggregate("b", "s"), d.aggregate("j", "m")
+(21, 8, 0)
+>>> d["n"] = 30
+>>> del d["i"]
+>>> d.aggregate("b", "s"), d.aggregate("b", "s", inclusive=(True, False))
+(31, 30)
+>>> highest = AggregatingSortedDict(d, op="max")
+>>> highest.aggregate(), highest.aggregate("o")
+(30, 6)
+>>> words = AggregatingSortedDict(dict(a="x", b="y", c="z"),
+...                               op=lambda x, y: x + y, identity="")
+>>> words.aggregate("b"), words.aggregate(maximum="b")
+('yz', 'xy')
+"""
+
+import functools
+import math
+import operator
+
+from . import SortedDict, SortedList
+
+_PRESETS = {"sum": (operator.add, 0),
+            "min": (min, math.inf),
+            "max": (max, -math.inf)}
+
+# Blocks are split once they grow beyond twice this length; updating or
+# querying a partial block costs O(_LOAD), the segment trees O(log n)
+_LOAD = 64
+
+
+class AggregatingSortedDict(SortedDict.SortedDict):
+
+    def __init__(self, dictionary=None, key=None, op="sum", identity=None,
+                 **kwargs):
+        """Initializes as SortedDict does; op is "sum", "min", "max" or
+        an associative function of two values, and identity is the
+        value that op leaves others unchanged with, which is required
+        for a function
+        """
+        super().__init__(dictionary, key, **kwargs)
+        if isinstance(op, str):
+            function, default = _PRESETS[op]
+            if identity is None:
+                identity = default
+        elif identity is None:
+            raise ValueError("an identity is required with a custom op")
+        else:
+            function = op
+        self.__key = key
+        self.__op_name = op
+        self.__op = function
+        self.__identity = identity
+        self.__rebuild()
+
+
+    def __rebuild(self):
+        """Rebuilds the blocks and the segment trees from the dictionary
+        """
+        values = list(super().values())
+        self.__blocks = [values[i:i + _LOAD]
+                         for i in range(0, len(values), _LOAD)]
+        self.__build_trees()
+
+
+    def __build_trees(self):
+        """Builds the segment trees over the block aggregates and the
+        block lengths; their leaves are padded to a power of two
+        """
+        op = self.__op
+        count = len(self.__blocks)
+        size = 1 << max(count - 1, 0).bit_length()
+        tree = [self.__identity] * (2 * size)
+        lengths = [0] * (2 * size)
+        for pos, block in enumerate(self.__blocks):
+            tree[size + pos] = functools.reduce(op, block, self.__identity)
+            lengths[size + pos] = len(block)
+        for i in range(size - 1, 0, -1):
+            tree[i] = op(tree[2 * i], tree[2 * i + 1])
+            lengths[i] = lengths[2 * i] + lengths[2 * i + 1]
+        self.__tree = tree
+        self.__lengths = lengths
+        self.__size = size
+
+
+    def __refresh(self, pos):
+        """Recomputes the pos-th block's aggregate and length and those
+        of its ancestors
+        """
+        op, tree, lengths = self.__op, self.__tree, self.__lengths
+        block = self.__blocks[pos]
+        i = self.__size + pos
+        tree[i] = functools.reduce(op, block, self.__identity)
+        lengths[i] = len(block)
+        i >>= 1
+        while i:
+            tree[i] = op(tree[2 * i], tree[2 * i + 1])
+            lengths[i] = lengths[2 * i] + lengths[2 * i + 1]
+            i >>= 1
+
+
+    def __locate(self, index):
+        """Returns the (block, offset) pair of the value at index
+        position index, or (number of blocks, 0) if index is the number
+        of values
+        """
+        lengths = self.__lengths
+        if index >= lengths[1]:
+            return len(self.__blocks), 0
+        i = 1
+        while i < self.__size:
+            i *= 2
+            if index >= lengths[i]:
+                index -= lengths[i]
+                i += 1
+        return i - self.__size, index
+
+
+    def __insert(self, index, value):
+        """Inserts value at index position index
+        """
+        blocks = self.__blocks
+        if not blocks:
+            blocks.append([value])
+            self.__build_trees()
+            return
+        pos, idx = self.__locate(index)
+        if pos == len(blocks):
+            pos -= 1
+            idx = len(blocks[pos])
+        block = blocks[pos]
+        block.insert(idx, value)
+        if len(block) > 2 * _LOAD:
+            blocks[pos:pos + 1] = [block[:_LOAD], block[_LOAD:]]
+            self.__build_trees()
+        else:
+            self.__refresh(pos)
+
+
+    def __remove(self, index):
+        """Removes the value at index position index
+        """
+        pos, idx = self.__locate(index)
+        block = self.__blocks[pos]
+        del block[idx]
+        if not block:
+            del self.__blocks[pos]
+            self.__build_trees()
+        else:
+            self.__refresh(pos)
+
+
+    def aggregate(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """Returns the values of the keys from minimum to maximum
+        combined with op in key order, or the identity if there are
+        none; the arguments are as for irange()
+
+        >>> d = AggregatingSortedDict({i: i for i in range(1000)})
+        >>> d.aggregate(10, 20), d.aggregate(10, 20, (False, False))
+        (165, 135)
+        >>> d.aggregate(990), d.aggregate(maximum=-1), d.aggregate(5, 1)
+        (9945, 0, 0)
+        >>> d = AggregatingSortedDict(key=str.lower, op=lambda x, y: x + y,
+        ...                           identity="")
+        >>> for k, v in (("b", "1"), ("a", "2"), ("A", "3"), ("B", "4")):
+        ...     d[k] = v
+        >>> "".join(d.values()), d.aggregate(), d.aggregate("b")
+        ('3241', '3241', '41')
+        """
+        if minimum is None:
+            start = 0
+        elif inclusive[0]:
+            start = self.bisect_left(minimum)
+        else:
+            start = self.bisect_right(minimum)
+        if maximum is None:
+            stop = len(self)
+        elif inclusive[1]:
+            stop = self.bisect_right(maximum)
+        else:
+            stop = self.bisect_left(maximum)
+        op, identity = self.__op, self.__identity
+        if start >= stop:
+            return identity
+        first, first_idx = self.__locate(start)
+        last, last_idx = self.__locate(stop)
+        blocks = self.__blocks
+        if first == last:
+            return functools.reduce(op, blocks[first][first_idx:last_idx],
+                                    identity)
+        result = functools.reduce(op, blocks[first][first_idx:], identity)
+        # Whole blocks from first + 1 up to last, from the segment tree
+        left, right = identity, identity
+        low, high = first + 1 + self.__size, last + self.__size
+        tree = self.__tree
+        while low < high:
+            if low & 1:
+                left = op(left, tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                right = op(tree[high], right)
+            low >>= 1
+            high >>= 1
+        result = op(result, op(left, right))
+        if last < len(blocks):
+            result = functools.reduce(op, blocks[last][:last_idx], result)
+        return result
+
+
+    def __setitem__(self, key, value):
+        if key in self:
+            pos, idx = self.__locate(self.index(key))
+            self.__blocks[pos][idx] = value
+            self.__refresh(pos)
+            super().__setitem__(key, value)
+        else:
+            super().__setitem__(key, value)
+            self.__insert(self.index(key), value)
+
+
+    def __delitem__(self, key):
+        index = self.index(key)
+        super().__delitem__(key)
+        self.__remove(index)
+
+
+    def pop(self, key, *args):
+        if key not in self:
+            return super().pop(key, *args)
+        index = self.index(key)
+        value = super().pop(key)
+        self.__remove(index)
+        return value
+
+
+    def popitem(self, index=-1):
+        size = len(self)
+        key, value = super().popitem(index)
+        self.__remove(index + size if index < 0 else index)
+        return key, value
+
+
+    def setdefault(self, key, value=None):
+        if key in self:
+            return self[key]
+        self[key] = value
+        return value
+
+
+    def update(self, dictionary=None, **kwargs):
+        """Updates as SortedDict does; a few items are set one by one,
+        while more rebuild the blocks and the trees
+
+        >>> d = AggregatingSortedDict({i: i for i in range(1000)})
+        >>> d.update({5: 0, 2000: 1})
+        >>> d.update({i: 1 for i in range(500)})
+        >>> d.aggregate(), d.aggregate(maximum=499)
+        (375251, 500)
+        """
+        items = dict(dictionary or {}, **kwargs)
+        if SortedList._one_by_one(len(items), len(self)):
+            for key, value in items.items():
+                self[key] = value
+        else:
+            super().update(items)
+            self.__rebuild()
+
+
+    def clear(self):
+        super().clear()
+        self.__rebuild()
+
+
+    def del_islice(self, start=None, stop=None):
+        """Deletes the items from index position start up to but
+        excluding stop as SortedDict does
+
+        >>> d = AggregatingSortedDict({i: i for i in range(1000)})
+        >>> d.del_islice(0, 10)
+        >>> d.del_islice(100)
+        >>> d.aggregate(), len(d)
+        (5950, 100)
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        super().del_islice(start, stop)
+        count = max(stop - start, 0)
+        if SortedList._one_by_one(count, len(self)):
+            for _ in range(count):
+                self.__remove(start)
+        else:
+            self.__rebuild()
+
+
+    @classmethod
+    def from_iterable(cls, items, key=None, workers=None,
+                      assume_sorted=False, op="sum", identity=None):
+        """Returns an AggregatingSortedDict of the items as
+        SortedDict.from_iterable() does, taking over the sorted key
+        index it builds rather than sorting the keys again
+
+        >>> d = AggregatingSortedDict.from_iterable(
+        ...         ((i, i) for i in range(3000, 0, -1)), workers=2, op="max")
+        >>> d.aggregate(maximum=100), d.peekitem(0)
+        (100, (1, 1))
+        """
+        result = cls(key=key, op=op, identity=identity)
+        result.__setstate__(SortedDict.SortedDict.from_iterable(
+                items, key, workers, assume_sorted).__reduce__()[2])
+        return result
+
+
+    def copy(self):
+        """Returns a shallow copy with the same key function and op,
+        sharing the key index as SortedDict.copy() does
+
+        >>> d = AggregatingSortedDict(dict(a=1, b=2), op="min")
+        >>> e = d.copy()
+        >>> e["c"] = -1
+        >>> d.aggregate(), e.aggregate(), list(d)
+        (1, -1, ['a', 'b'])
+        """
+        keys, values, _ = super().__reduce__()[2]
+        result = self.__class__(key=self.__key, op=self.__op_name,
+                                identity=self.__identity)
+        result.__setstate__((keys.copy(), values, {}))
+        return result
+
+    __copy__ = copy
+
+
+    def __reduce__(self):
+        """Pickles as SortedDict does, leaving out the blocks and the
+        segment trees, which unpickling rebuilds from the values
+
+        >>> import pickle
+        >>> d = AggregatingSortedDict({i: i for i in range(300)}, op="max")
+        >>> e = pickle.loads(pickle.dumps(d))
+        >>> e[1000] = 5
+        >>> e.aggregate(), e.aggregate(10, 20)
+        (299, 20)
+        """
+        function, args, (keys, values, attributes) = super().__reduce__()
+        for name in ("blocks", "tree", "lengths", "size"):
+            del attributes["_AggregatingSortedDict__" + name]
+        return function, args, (keys, values, attributes)
+
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.__rebuild()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
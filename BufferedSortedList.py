@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+"""A SortedList that defers placing added values until they are needed
+
+A BufferedSortedList appends added values to an unsorted buffer, so a
+burst of adds runs at the speed of list.append() and doesn't call the
+key function. The buffer is flushed into the list, by sorting it and
+merging it in as SortedList.update() does, before anything that reads
+or removes values, such as indexing, index(), iteration or "in", and
+whenever it reaches threshold values if a threshold is given. Reads
+therefore always see a sorted list; len() counts the buffer and doesn't
+flush it.
+
+>>> L = BufferedSortedList((5, 8, -1))
+>>> for x in (22, 3, 4, 3):
+...     L.add(x)
+>>> len(L), L.buffered
+(7, 4)
+>>> L[1], L.index(4), 22 in L
+(3, 3, True)
+>>> L.buffered
+0
+>>> L.update(range(10, 0, -3))
+>>> print(L)
+[-1, 1, 3, 3, 4, 4, 5, 7, 8, 10, 22]
+>>> L = BufferedSortedList(threshold=3)
+>>> L.update((2, 1))
+>>> L.add(0)
+>>> L.buffered, list(L.islice(0, 3))
+(0, [0, 1, 2])
+>>> import pickle
+>>> L.add(-1)
+>>> m = pickle.loads(pickle.dumps(L))
+>>> m.buffered, len(m)
+(1, 4)
+>>> m.update((5, 4))
+>>> m.buffered, m[:]
+(0, [-1, 0, 1, 2, 4, 5])
+"""
+
+import functools
+
+from . import SortedList
+
+
+def _flushing(method):
+    """Returns a version of method that flushes the buffer first
+    """
+    @functools.wraps(method)
+    def flushing(self, *args, **kwargs):
+        self.flush()
+        return method(self, *args, **kwargs)
+    return flushing
+
+
+class BufferedSortedList(SortedList.SortedList):
+
+    def __init__(self, sequence=None, key=None, threshold=None):
+        """Initializes as SortedList does; threshold, if given, is the
+        number of buffered values at which the buffer is flushed even
+        though nothing has read the list
+        """
+        self.__buffer = []
+        self.__threshold = threshold
+        super().__init__(sequence, key)
+
+
+    @property
+    def buffered(self):
+        """Returns the number of values added but not yet placed
+        """
+        return len(self.__buffer)
+
+
+    def add(self, value):
+        """Adds a value to the buffer
+        """
+        self.__buffer.append(value)
+        if (self.__threshold is not None and
+                len(self.__buffer) >= self.__threshold):
+            self.flush()
+
+
+    def update(self, iterable):
+        """Adds every value from the iterable to the buffer
+        """
+        self.__buffer.extend(iterable)
+        if (self.__threshold is not None and
+                len(self.__buffer) >= self.__threshold):
+            self.flush()
+
+    add_many = update
+
+
+    def flush(self):
+        """Sorts the buffered values and merges them into the list
+
+        If that fails, as when a value can't be compared with the
+        others, the values not yet placed stay in the buffer.
+        >>> L = BufferedSortedList(("the", "Quick"), str.lower)
+        >>> L.update(("brown", "Fox"))
+        >>> L.flush()
+        >>> L.buffered, L[:]
+        (0, ['brown', 'Fox', 'Quick', 'the'])
+        >>> L = BufferedSortedList(range(10))
+        >>> L.update(range(100))
+        >>> L.add("oops")
+        >>> L[0] #doctest: +IGNORE_EXCEPTION_DETAIL
+        Traceback (most recent call last):
+        ...
+        TypeError: '<' not supported between instances of 'str' and 'int'
+        >>> len(L), L.buffered
+        (111, 101)
+        >>> L = BufferedSortedList(range(1000))
+        >>> L.update((5, 7, "oops", 9))
+        >>> L.flush() #doctest: +IGNORE_EXCEPTION_DETAIL
+        Traceback (most recent call last):
+        ...
+        TypeError: '<' not supported between instances of 'str' and 'int'
+        >>> len(L), L.buffered
+        (1004, 2)
+        """
+        if self.__buffer:
+            # The buffer is emptied first because SortedList.update()
+            # iterates over the list, which would flush it again
+            buffer, self.__buffer = self.__buffer, []
+            start = super().__len__()
+            try:
+                super().update(buffer)
+            except BaseException:
+                # update() places a batch whole or its values one at a
+                # time in order, so those placed are a prefix of it
+                self.__buffer = buffer[super().__len__() - start:]
+                raise
+
+
+    def clear(self):
+        self.__buffer = []
+        super().clear()
+
+
+    def __len__(self):
+        return super().__len__() + len(self.__buffer)
+
+
+    def copy(self):
+        """Returns a shallow copy with the same key function and
+        threshold, sharing the list's storage as SortedList.copy() does
+        """
+        return self.__class__(self, self.key, self.__threshold)
+
+    __copy__ = copy
+
+
+    def snapshot(self):
+        """Returns a read-only SortedList of the values
+
+        >>> L = BufferedSortedList((5, 8))
+        >>> L.add(-1)
+        >>> s = L.snapshot()
+        >>> L.add(3)
+        >>> print(s, type(s).__name__)
+        [-1, 5, 8] SortedList
+        """
+        self.flush()
+        return SortedList.SortedList(self, self.key).snapshot()
+
+
+# Everything else that reads the values or removes them needs them in
+# order, so flushes first
+for _name in ("pop", "remove", "remove_every", "count", "contains_many",
+              "index_many", "count_many", "count_range", "index",
+              "bisect_left", "bisect_right", "bisect_key_left",
+              "bisect_key_right", "rank", "select", "percentile", "median",
+              "irange", "irange_key", "islice", "union", "intersection",
+              "difference", "symmetric_difference", "__delitem__",
+              "__getitem__", "__iter__", "__reversed__", "__contains__",
+              "__str__"):
+    setattr(BufferedSortedList, _name,
+            _flushing(getattr(SortedList.SortedList, _name)))
+del _name
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+"""A SortedDict that can be shared between threads
+
+A SortedDict changes the dict and its sorted key index in two steps, so
+a thread reading while another writes can find a key in one but not the
+other. ConcurrentSortedDict wraps a SortedDict and guards it with:
+
+- a reader-writer lock: any number of threads may read at once, while
+  adding or removing keys excludes everyone else;
+- striped locks: setting the value of a key that is already present
+  leaves the key index alone, so it only needs a read lock plus the
+  lock of the key's stripe, and writers to different stripes don't
+  wait for each other;
+- snapshots: iteration works on a read-only copy that is made on first
+  use after a change and then shared by every reader until the next
+  change, so iterating never holds a lock or sees a change midway.
+
+>>> d = ConcurrentSortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+>>> d["b"] = 7
+>>> d["n"] = 30
+>>> for key in d:
+...     d["z" + key] = 0
+>>> len(d), d["n"], d.value_at(1), "za" in d
+(14, 30, 7, True)
+>>> list(d.irange("b", "n"))
+['b', 'i', 'n']
+>>> import threading
+>>> def work(offset):
+...     for i in range(200):
+...         d[offset + i] = i
+...         d[offset] = -i
+>>> d = ConcurrentSortedDict()
+>>> threads = [threading.Thread(target=work, args=(n * 1000,))
+...            for n in range(4)]
+>>> for thread in threads:
+...     thread.start()
+>>> for thread in threads:
+...     thread.join()
+>>> len(d), d[3000], list(d.keys())[:3]
+(800, -199, [0, 1, 2])
+"""
+
+import collections.abc
+import contextlib
+import itertools
+import threading
+
+from . import SortedDict
+
+
+class _ReadWriteLock:
+    """Allows many readers or one writer at a time; waiting writers
+    stop new readers from starting so that they aren't starved
+
+    The lock isn't reentrant.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writing = False
+        self.__waiting_writers = 0
+
+
+    @contextlib.contextmanager
+    def reading(self):
+        with self.__condition:
+            while self.__writing or self.__waiting_writers:
+                self.__condition.wait()
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__condition.notify_all()
+
+
+    @contextlib.contextmanager
+    def writing(self):
+        with self.__condition:
+            self.__waiting_writers += 1
+            while self.__writing or self.__readers:
+                self.__condition.wait()
+            self.__waiting_writers -= 1
+            self.__writing = True
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__writing = False
+                self.__condition.notify_all()
+
+
+class ConcurrentSortedDict(collections.abc.MutableMapping):
+
+    def __init__(self, dictionary=None, key=None, stripes=16, **kwargs):
+        """Initializes as SortedDict does; stripes is the number of
+        locks that overwrites of existing keys are spread over
+        """
+        self.__dict = SortedDict.SortedDict(dictionary, key, **kwargs)
+        self.__lock = _ReadWriteLock()
+        self.__stripes = [threading.Lock() for _ in range(stripes)]
+        self.__versions = itertools.count(1)
+        self.__version = 0
+        self.__snapshot = (None, None)
+        self.__snapshot_lock = threading.Lock()
+
+
+    def __changed(self):
+        """Marks the current snapshot as out of date
+        """
+        self.__version = next(self.__versions)
+
+
+    def snapshot(self):
+        """Returns a SortedDict copy of the dictionary as it is now
+
+        The copy is shared with other callers until the dictionary next
+        changes, so it must not be modified.
+        >>> d = ConcurrentSortedDict(dict(s=1, a=2))
+        >>> first = d.snapshot()
+        >>> first is d.snapshot()
+        True
+        >>> d["a"] = 3
+        >>> second = d.snapshot()
+        >>> first is second, first["a"], second["a"]
+        (False, 2, 3)
+        """
+        version, snapshot = self.__snapshot
+        if version == self.__version:
+            return snapshot
+        with self.__snapshot_lock:
+            version, snapshot = self.__snapshot
+            if version == self.__version:
+                return snapshot
+            with self.__lock.reading():
+                # A concurrent overwrite changes the version after
+                # setting the value, so a copy racing with it is never
+                # cached as current
+                version = self.__version
+                snapshot = self.__dict.copy()
+            self.__snapshot = version, snapshot
+            return snapshot
+
+
+    def __getitem__(self, key):
+        with self.__lock.reading():
+            return self.__dict[key]
+
+
+    def __contains__(self, key):
+        with self.__lock.reading():
+            return key in self.__dict
+
+
+    def get(self, key, default=None):
+        with self.__lock.reading():
+            return self.__dict.get(key, default)
+
+
+    def __len__(self):
+        return len(self.__dict)
+
+
+    def __setitem__(self, key, value):
+        """Sets the value of key; overwriting the value of a key that
+        is already present only takes a read lock and key's stripe lock
+        """
+        with self.__lock.reading():
+            with self.__stripes[hash(key) % len(self.__stripes)]:
+                if key in self.__dict:
+                    self.__dict[key] = value
+                    self.__changed()
+                    return
+        with self.__lock.writing():
+            self.__dict[key] = value
+            self.__changed()
+
+
+    def __delitem__(self, key):
+        with self.__lock.writing():
+            del self.__dict[key]
+            self.__changed()
+
+
+    def pop(self, key, *args):
+        with self.__lock.writing():
+            self.__changed()
+            return self.__dict.pop(key, *args)
+
+
+    def popitem(self, index=-1):
+        with self.__lock.writing():
+            self.__changed()
+            return self.__dict.popitem(index)
+
+
+    def setdefault(self, key, value=None):
+        with self.__lock.writing():
+            self.__changed()
+            return self.__dict.setdefault(key, value)
+
+
+    def update(self, dictionary=None, **kwargs):
+        with self.__lock.writing():
+            self.__dict.update(dictionary, **kwargs)
+            self.__changed()
+
+
+    def clear(self):
+        with self.__lock.writing():
+            self.__dict.clear()
+            self.__changed()
+
+
+    def del_islice(self, start=None, stop=None):
+        with self.__lock.writing():
+            self.__dict.del_islice(start, stop)
+            self.__changed()
+
+
+    def evict_before(self, key, inclusive=False):
+        with self.__lock.writing():
+            self.__changed()
+            return self.__dict.evict_before(key, inclusive)
+
+
+    def value_at(self, index):
+        with self.__lock.reading():
+            return self.__dict.value_at(index)
+
+
+    def peekitem(self, index=-1):
+        with self.__lock.reading():
+            return self.__dict.peekitem(index)
+
+
+    def index(self, key):
+        with self.__lock.reading():
+            return self.__dict.index(key)
+
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+
+    def __reversed__(self):
+        return reversed(self.snapshot())
+
+
+    def keys(self):
+        """Returns the keys of a snapshot
+        """
+        return self.snapshot().keys()
+
+
+    def values(self):
+        """Returns the values of a snapshot
+        """
+        return self.snapshot().values()
+
+
+    def items(self):
+        """Returns the items of a snapshot
+        """
+        return self.snapshot().items()
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the keys of a snapshot from minimum
+        to maximum; the arguments are as for SortedDict.irange()
+        """
+        return self.snapshot().irange(minimum, maximum, inclusive, reverse)
+
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the keys of a snapshot from index
+        position start up to but excluding stop
+        """
+        return self.snapshot().islice(start, stop, reverse)
+
+
+    def copy(self):
+        """Returns a new ConcurrentSortedDict with the same items
+        """
+        result = ConcurrentSortedDict(stripes=len(self.__stripes))
+        result.__dict = self.snapshot().copy()
+        return result
+
+    __copy__ = copy
+
+
+    def __str__(self):
+        return str(self.snapshot())
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
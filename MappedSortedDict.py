@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+
+"""A disk-backed sorted dictionary whose sorted keys are memory-mapped
+
+A MappedSortedDict stored at path consists of two files:
+
+path.keys       a header, a table of fixed-size entries in key order and
+                the pickled keys; each entry gives where its key is in
+                the file and where its value is in the data file
+path.N.data     the pickled values, only ever appended to; N is the
+                generation, which compact() increments
+
+Opening only maps the keys file, so it takes the same time however many
+items there are; keys are unpickled as bisection probes them and values
+as they are read. Items set or deleted since opening are held in memory
+until flush() (called by close()) merges them into a new keys file,
+copying the unchanged entries and keys without unpickling them.
+compact() also rewrites the data file without the values that have been
+overwritten or deleted, and the keys file without the keys of deleted
+items, optionally in a background thread.
+
+Iterators see the items as they were when iteration began: they keep
+the maps of the files they started on, which are only closed once no
+iterator uses them, so flush() and compact() don't disturb them.
+
+>>> import os, tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), "prices")
+>>> with MappedSortedDict(path) as d:
+...     d.update(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+...     d["n"] = 30
+...     del d["t"]
+>>> d = MappedSortedDict(path)
+>>> list(d.items())
+[('a', 2), ('i', 4), ('n', 30), ('s', 1), ('y', 6)]
+>>> d["z"] = 26
+>>> d.value_at(2), d.value_at(-1), len(d)
+(30, 26, 6)
+>>> list(d.irange("b", "s"))
+['i', 'n', 's']
+>>> d.compact()
+>>> d["a"], d.get("b")
+(2, None)
+>>> d.close()
+"""
+
+import collections.abc
+import heapq
+import mmap
+import os
+import pickle
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+from . import SortedDict
+
+# magic, generation, number of entries
+_HEADER = struct.Struct("<8sQQ")
+# key offset within the key area, key length, value offset, value length
+_ENTRY = struct.Struct("<QIQI")
+_MAGIC = b"MSDKEYS1"
+
+
+class _Keys:
+    """A read-only sequence of the keys in a mapped keys file; bisect
+    works on it directly, unpickling only the keys it probes
+    """
+
+    def __init__(self, keys_map):
+        self.map = keys_map
+        magic, self.generation, self.count = _HEADER.unpack_from(keys_map)
+        if magic != _MAGIC:
+            raise ValueError("not a MappedSortedDict keys file")
+        self.key_area = _HEADER.size + self.count * _ENTRY.size
+
+
+    def entry(self, index):
+        return _ENTRY.unpack_from(self.map,
+                                  _HEADER.size + index * _ENTRY.size)
+
+
+    def entries(self, start, stop):
+        """Returns the raw bytes of entries start to stop as a view of
+        the map
+        """
+        return memoryview(self.map)[_HEADER.size + start * _ENTRY.size:
+                                    _HEADER.size + stop * _ENTRY.size]
+
+
+    def key_bytes(self, index):
+        offset, length = self.entry(index)[:2]
+        start = self.key_area + offset
+        return self.map[start:start + length]
+
+
+    def __getitem__(self, index):
+        return pickle.loads(self.key_bytes(index))
+
+
+    def __len__(self):
+        return self.count
+
+
+class MappedSortedDict(collections.abc.MutableMapping):
+
+    def __init__(self, path):
+        """Opens the MappedSortedDict stored at path, creating it if
+        it doesn't exist
+        """
+        self.__path = path
+        self.__lock = threading.RLock()
+        # held by flush() and compact() while they replace files
+        self.__rewrite_lock = threading.Lock()
+        # key -> (value offset, value length), or None if deleted
+        self.__pending = SortedDict.SortedDict()
+        if not os.path.exists(self.__keys_path()):
+            self.__write_keys(self.__keys_path(), 0, [])
+        self.__keys = None
+        self.__open_keys()
+        self.__len = len(self.__keys)
+        self.__open_data(self.__keys.generation)
+
+
+    def __keys_path(self):
+        return self.__path + ".keys"
+
+
+    def __data_path(self, generation):
+        return "{0}.{1}.data".format(self.__path, generation)
+
+
+    def __open_keys(self):
+        """Maps the keys file, replacing any previous mapping; that is
+        left for the iterators still reading it to release
+        """
+        with open(self.__keys_path(), "rb") as file:
+            keys_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__keys = _Keys(keys_map)
+
+
+    def __open_data(self, generation):
+        """Opens the data file of the given generation for appending;
+        it is mapped for reading on demand
+        """
+        self.__data = open(self.__data_path(generation), "ab", buffering=0)
+        self.__data_map = None
+
+
+    def __close_data(self):
+        if self.__data_map is not None:
+            self.__data_map.close()
+        self.__data.close()
+
+
+    @staticmethod
+    def __write_keys(path, generation, records):
+        """Writes a keys file from a list of (pickled key, value offset,
+        value length) records in key order, atomically replacing path
+        """
+        def chunks():
+            yield _HEADER.pack(_MAGIC, generation, len(records))
+            offset = 0
+            for key, value_offset, value_length in records:
+                yield _ENTRY.pack(offset, len(key), value_offset,
+                                  value_length)
+                offset += len(key)
+            for key, _, _ in records:
+                yield key
+        MappedSortedDict.__write(path, chunks())
+
+
+    @staticmethod
+    def __write(path, chunks):
+        """Writes the byte strings from chunks to a file, atomically
+        replacing path
+        """
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+
+    def __map_data(self, size):
+        """Returns a map of the data file that covers its first size
+        bytes, remapping it if it has grown (or None if size is 0, as
+        an empty file can't be mapped); a map that is replaced is left
+        for the iterators still reading it to release
+        """
+        data_map = self.__data_map
+        if size and (data_map is None or size > len(data_map)):
+            with open(self.__data.name, "rb") as file:
+                data_map = mmap.mmap(file.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+            self.__data_map = data_map
+        return data_map
+
+
+    def __read(self, offset, length):
+        """Returns the bytes of the data file at offset
+        """
+        return self.__map_data(offset + length)[offset:offset + length]
+
+
+    def __append(self, data):
+        """Appends data to the data file and returns its offset
+        """
+        offset = self.__data.seek(0, os.SEEK_END)
+        self.__data.write(data)
+        return offset
+
+
+    def __locate(self, key):
+        """Returns the (value offset, value length) of key or None
+        """
+        if key in self.__pending:
+            return self.__pending[key]
+        keys = self.__keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return keys.entry(index)[2:]
+        return None
+
+
+    def __getitem__(self, key):
+        with self.__lock:
+            location = self.__locate(key)
+            if location is None:
+                raise KeyError(key)
+            return pickle.loads(self.__read(*location))
+
+
+    def __setitem__(self, key, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.__lock:
+            if self.__locate(key) is None:
+                self.__len += 1
+            self.__pending[key] = self.__append(data), len(data)
+
+
+    def __delitem__(self, key):
+        with self.__lock:
+            if self.__locate(key) is None:
+                raise KeyError(key)
+            self.__pending[key] = None
+            self.__len -= 1
+
+
+    def __contains__(self, key):
+        with self.__lock:
+            return self.__locate(key) is not None
+
+
+    def __len__(self):
+        return self.__len
+
+
+    def __iter__(self):
+        return self.irange()
+
+
+    def __scan(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns a map of the data file and an iterator over a (key,
+        (value offset, value length), index) triple for each live item
+        in the range in key order, merging the keys file with the
+        pending changes; index is the key's position in the keys file
+        or None if the item is pending
+
+        The iterator only reads the maps and the pending changes as
+        they are now, so it needs no lock and isn't affected by later
+        changes, flush() or compact().
+        """
+        with self.__lock:
+            keys = self.__keys
+            data = self.__map_data(self.__data.seek(0, os.SEEK_END))
+            start, stop = 0, len(keys)
+            if minimum is not None:
+                bisect = bisect_left if inclusive[0] else bisect_right
+                start = bisect(keys, minimum)
+            if maximum is not None:
+                bisect = bisect_right if inclusive[1] else bisect_left
+                stop = bisect(keys, maximum)
+            changes = [(key, self.__pending[key], None) for key in
+                       self.__pending.irange(minimum, maximum, inclusive,
+                                             reverse)]
+        pending = {key for key, _, _ in changes}
+        positions = range(start, max(start, stop))
+        if reverse:
+            positions = reversed(positions)
+        stored = ((key, keys.entry(index)[2:], index)
+                  for key, index in ((keys[index], index)
+                                     for index in positions)
+                  if key not in pending)
+        merged = heapq.merge(changes, stored, key=itemgetter(0),
+                             reverse=reverse)
+        return data, (item for item in merged if item[1] is not None)
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the keys from minimum to maximum;
+        the arguments are as for SortedList.irange()
+        """
+        _, scan = self.__scan(minimum, maximum, inclusive, reverse)
+        return (key for key, _, _ in scan)
+
+
+    def irange_items(self, minimum=None, maximum=None,
+                     inclusive=(True, True), reverse=False):
+        """Returns an iterator over the items whose keys are from
+        minimum to maximum
+
+        >>> import os, tempfile
+        >>> d = MappedSortedDict(os.path.join(tempfile.mkdtemp(), "d"))
+        >>> d.update(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.flush()
+        >>> d["b"] = 7
+        >>> del d["n"]
+        >>> list(d.irange_items("a", "n", reverse=True))
+        [('i', 4), ('b', 7), ('a', 2)]
+        >>> for key, value in d.irange_items():
+        ...     d[key.upper()] = value
+        ...     d.compact()
+        >>> list(d.items())[:6]
+        [('A', 2), ('B', 7), ('I', 4), ('S', 1), ('T', 5), ('Y', 6)]
+        >>> items = d.items()
+        >>> d["@"] = 0
+        >>> next(items)
+        ('A', 2)
+        >>> d.close()
+        """
+        data, scan = self.__scan(minimum, maximum, inclusive, reverse)
+        return ((key, pickle.loads(data[offset:offset + length]))
+                for key, (offset, length), _ in scan)
+
+
+    def items(self):
+        """Returns an iterator over the items in key order
+        """
+        return self.irange_items()
+
+
+    def value_at(self, index):
+        """Returns the index-th item's value
+
+        Any pending changes are flushed first so that the keys file
+        can be indexed directly. Flushing rewrites the keys file, which
+        takes O(n) time, so a change between each call and the next
+        makes every call O(n); make the changes together first.
+        """
+        return self.item_at(index)[1]
+
+
+    def item_at(self, index):
+        """Returns the index-th item as a (key, value) pair; as for
+        value_at() pending changes are flushed first
+        """
+        if self.__pending:
+            self.flush()
+        with self.__lock:
+            keys = self.__keys
+            if index < 0:
+                index += len(keys)
+            if not 0 <= index < len(keys):
+                raise IndexError("list index out of range")
+            return (keys[index],
+                    pickle.loads(self.__read(*keys.entry(index)[2:])))
+
+
+    def flush(self):
+        """Merges the pending changes into a new keys file
+        """
+        with self.__rewrite_lock:
+            self.__merge_pending()
+
+
+    def __merge_pending(self):
+        """flush() for callers already holding the rewrite lock
+
+        Each pending key is bisected into the keys file, so only the
+        keys probed are unpickled. The runs of entries between them and
+        the whole key area are copied as they are, with the keys added
+        appended to the key area; the keys of deleted items stay in it
+        until compact() rewrites the keys file.
+        """
+        with self.__lock:
+            if not self.__pending:
+                return
+            keys = self.__keys
+            entries = []
+            added = []
+            count = 0
+            key_end = len(keys.map) - keys.key_area
+            start = 0
+            for key, location in self.__pending.items():
+                index = bisect_left(keys, key, start)
+                entries.append(keys.entries(start, index))
+                count += index - start
+                start = index
+                if index < len(keys) and keys[index] == key:
+                    key_offset, key_length = keys.entry(index)[:2]
+                    start += 1
+                elif location is not None:
+                    data = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+                    key_offset, key_length = key_end, len(data)
+                    key_end += len(data)
+                    added.append(data)
+                if location is not None:
+                    entries.append(_ENTRY.pack(key_offset, key_length,
+                                               *location))
+                    count += 1
+            entries.append(keys.entries(start, len(keys)))
+            count += len(keys) - start
+            header = _HEADER.pack(_MAGIC, keys.generation, count)
+            key_area = memoryview(keys.map)[keys.key_area:]
+            self.__write(self.__keys_path(),
+                         [header] + entries + [key_area] + added)
+            # The views have to go before the map can be closed
+            del entries, key_area
+            self.__pending.clear()
+            self.__open_keys()
+
+
+    def compact(self, background=False):
+        """Rewrites the data file keeping only the live values
+
+        If background is True the work is done in a new thread which
+        is returned; reads and writes carry on meanwhile, but flush()
+        and other calls to compact() wait for it to finish.
+        """
+        if background:
+            thread = threading.Thread(target=self.compact, daemon=True)
+            thread.start()
+            return thread
+        with self.__rewrite_lock:
+            self.__compact()
+
+
+    def __compact(self):
+        with self.__lock:
+            self.__merge_pending()
+            keys = self.__keys
+            old_path = self.__data.name
+        generation = keys.generation + 1
+        new_path = self.__data_path(generation)
+        records = []
+        # The keys file can't change while the rewrite lock is held and
+        # the data file is only appended to, so both can be read unlocked
+        with open(old_path, "rb") as old, open(new_path, "wb") as new:
+            for index in range(len(keys)):
+                offset, length = keys.entry(index)[2:]
+                old.seek(offset)
+                records.append((keys.key_bytes(index), new.tell(), length))
+                new.write(old.read(length))
+            new.flush()
+            os.fsync(new.fileno())
+        keys_path = self.__keys_path()
+        self.__write_keys(keys_path + ".new", generation, records)
+        with self.__lock:
+            # Values written since the copy are still in the old file
+            with open(old_path, "rb") as old, open(new_path, "ab") as new:
+                for key, location in self.__pending.items():
+                    if location is not None:
+                        old.seek(location[0])
+                        self.__pending[key] = (new.tell(), location[1])
+                        new.write(old.read(location[1]))
+            os.replace(keys_path + ".new", keys_path)
+            self.__open_keys()
+            # The old data file's map is left to the iterators reading
+            # it, which can go on doing so once it is removed
+            self.__data.close()
+            self.__open_data(generation)
+        os.remove(old_path)
+
+
+    def close(self):
+        """Flushes any pending changes and closes the files
+        """
+        self.flush()
+        with self.__lock:
+            self.__close_data()
+            self.__keys.map.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+"""A read-only sorted list of machine numbers in shared memory
+
+One process publishes a sorted index with SharedSortedList.publish();
+any number of processes then attach to it by name and read it in place,
+without unpickling or copying, so memory use doesn't grow with the
+number of readers.
+
+A published list lives in two shared memory blocks:
+
+name            the control block: a generation counter and the name
+                of the current data block
+name_G          the data block of generation G: the typecode, the
+                number of values and the values themselves in order
+
+Publishing again under the same name writes a new data block and then
+switches the control block to it; readers keep the data block they are
+attached to until they call refresh(). The generation counter works as
+a sequence lock: it is made odd before the data block name is changed
+and even again afterwards. Data block names are stored in _NAME_SIZE
+bytes, so name can be at most _NAME_SIZE - 21 bytes long in UTF-8.
+
+>>> import os
+>>> name = "ssl_doctest_{0}".format(os.getpid())
+>>> writer = SharedSortedList.publish(name, [5, 8, -1, 3, 4, 22, 5], "i")
+>>> reader = SharedSortedList(name)
+>>> len(reader), reader[0], reader[-1], 5 in reader, reader.count(5)
+(7, -1, 22, True, 2)
+>>> list(reader.irange(3, 5)), reader.bisect_right(5), reader.index(8)
+([3, 4, 5, 5], 5, 5)
+>>> SharedSortedList.publish(name, range(100), "i").close()
+>>> len(reader), reader.refresh(), len(reader), reader.refresh()
+(7, True, 100, False)
+>>> reader.close()
+>>> writer.unlink()
+"""
+
+import array
+import struct
+import time
+from bisect import bisect_left, bisect_right
+from multiprocessing import resource_tracker, shared_memory
+
+from . import TypedSortedList
+
+_NAME_SIZE = 56
+# generation, name of the data block
+_CONTROL = struct.Struct("<Q{0}s".format(_NAME_SIZE))
+_GENERATION = struct.Struct("<Q")
+_DATA_NAME = struct.Struct("<{0}s".format(_NAME_SIZE))
+# How long a reader waits for a publisher to finish changing the
+# control block before deciding that it died part way through
+_TIMEOUT = 1.0
+# typecode, number of values
+_HEADER = struct.Struct("<c7xQ")
+
+
+def _attach(name):
+    """Attaches to an existing shared memory block without letting this
+    process's resource tracker destroy it when the process exits
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        block = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+def _unlink(name):
+    """Destroys the shared memory block called name
+    """
+    try:
+        block = shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # unlink() unregisters the block, so here it stays registered
+        block = shared_memory.SharedMemory(name)
+    block.close()
+    block.unlink()
+
+
+class SharedSortedList:
+
+    def __init__(self, name):
+        """Attaches to the SharedSortedList published under name
+        """
+        self.__name = name
+        self.__control = _attach(name)
+        self.__block = None
+        self.__values = None
+        self.__generation = None
+        self.refresh()
+
+
+    @classmethod
+    def publish(cls, name, values, typecode="d"):
+        """Publishes the values, or replaces the values already
+        published, under name and returns a SharedSortedList attached
+        to them
+
+        values may be a TypedSortedList, whose buffer is copied
+        directly, or any iterable of numbers, which is sorted first.
+        >>> SharedSortedList.publish("n" * 36, [1])
+        Traceback (most recent call last):
+        ...
+        ValueError: publish(): name is longer than 35 bytes
+        """
+        # The data block names add "_" and up to 20 digits to name
+        if len(name.encode()) > _NAME_SIZE - 21:
+            raise ValueError("publish(): name is longer than {0} "
+                             "bytes".format(_NAME_SIZE - 21))
+        if not isinstance(values, TypedSortedList.TypedSortedList):
+            values = TypedSortedList.TypedSortedList(values, typecode)
+        try:
+            control = _attach(name)
+        except FileNotFoundError:
+            control = shared_memory.SharedMemory(name, create=True,
+                                                 size=_CONTROL.size)
+            resource_tracker.unregister(control._name, "shared_memory")
+            _CONTROL.pack_into(control.buf, 0, 0, b"")
+        generation, old_name = _CONTROL.unpack_from(control.buf)
+        # The next even generation, even if a publisher died leaving
+        # the generation odd
+        generation += 2 - generation % 2
+        data_name = "{0}_{1}".format(name, generation)
+        source = values.buffer()
+        block = shared_memory.SharedMemory(
+                data_name, create=True, size=_HEADER.size + source.nbytes)
+        resource_tracker.unregister(block._name, "shared_memory")
+        _HEADER.pack_into(block.buf, 0, values.typecode.encode(),
+                          len(values))
+        block.buf[_HEADER.size:_HEADER.size + source.nbytes] = (
+                source.cast("B"))
+        source.release()
+        block.close()
+        _GENERATION.pack_into(control.buf, 0, generation - 1)
+        _DATA_NAME.pack_into(control.buf, _GENERATION.size,
+                             data_name.encode())
+        _GENERATION.pack_into(control.buf, 0, generation)
+        control.close()
+        old_name = old_name.rstrip(b"\0").decode()
+        if old_name:
+            # Readers still attached keep their mapping of the old block
+            _unlink(old_name)
+        return cls(name)
+
+
+    def __read_control(self):
+        """Returns a consistent (generation, data block name) pair, or
+        raises TimeoutError if a publisher doesn't finish changing them
+        within _TIMEOUT seconds
+        """
+        deadline = time.monotonic() + _TIMEOUT
+        while True:
+            generation, data_name = _CONTROL.unpack_from(self.__control.buf)
+            if not generation % 2 and (generation, data_name) == (
+                    _CONTROL.unpack_from(self.__control.buf)):
+                return generation, data_name.rstrip(b"\0").decode()
+            if time.monotonic() > deadline:
+                raise TimeoutError("SharedSortedList {0!r} is being "
+                                   "published".format(self.__name))
+            time.sleep(0)
+
+
+    def refresh(self):
+        """Attaches to the most recently published values if they have
+        changed; returns True if they have
+        """
+        while True:
+            generation, data_name = self.__read_control()
+            if generation == self.__generation:
+                return False
+            try:
+                block = _attach(data_name)
+            except FileNotFoundError:
+                # Replaced and removed since the control block was read,
+                # unless the control block still names it
+                if self.__read_control() == (generation, data_name):
+                    raise
+                continue
+            self.__release()
+            typecode, count = _HEADER.unpack_from(block.buf)
+            typecode = typecode.decode()
+            # The block may have been rounded up to a whole page
+            stop = _HEADER.size + count * struct.calcsize(typecode)
+            self.__block = block
+            self.__values = block.buf[_HEADER.size:stop].cast(typecode)
+            self.__generation = generation
+            return True
+
+
+    @property
+    def generation(self):
+        """Returns the generation of the values attached to
+        """
+        return self.__generation
+
+
+    @property
+    def typecode(self):
+        return self.__values.format
+
+
+    def __release(self):
+        if self.__values is not None:
+            self.__values.release()
+            self.__values = None
+        if self.__block is not None:
+            self.__block.close()
+            self.__block = None
+
+
+    def close(self):
+        """Detaches from the shared memory; the values stay published
+        """
+        self.__release()
+        self.__control.close()
+
+
+    def unlink(self):
+        """Detaches from the shared memory and destroys it, so that the
+        name can no longer be attached to
+        """
+        data_name = self.__read_control()[1]
+        self.close()
+        _unlink(data_name)
+        _unlink(self.__name)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def __del__(self):
+        # The values view must go before the block it was taken from
+        if getattr(self, "_SharedSortedList__control", None) is not None:
+            self.close()
+
+
+    def __getitem__(self, index):
+        """Returns the value at the given index position, or a list of
+        the values for a slice
+        """
+        if isinstance(index, slice):
+            return self.__values[index].tolist()
+        return self.__values[index]
+
+
+    def __len__(self):
+        return len(self.__values)
+
+
+    def __iter__(self):
+        return iter(self.__values)
+
+
+    def __reversed__(self):
+        return reversed(self.__values)
+
+
+    def __probe(self, value):
+        """Returns value as it would be stored, rounded to single
+        precision for typecode 'f', as TypedSortedList does
+
+        >>> import os
+        >>> name = "ssl_probe_{0}".format(os.getpid())
+        >>> L = SharedSortedList.publish(name, [0.1, 0.2, 0.1], "f")
+        >>> 0.1 in L, L.count(0.1), L.index(0.2), list(L.irange(0.2))
+        (True, 2, 2, [0.20000000298023224])
+        >>> L.unlink()
+        """
+        if self.__values.format == "f":
+            return array.array("f", (value,))[0]
+        return value
+
+
+    def __contains__(self, value):
+        value = self.__probe(value)
+        index = bisect_left(self.__values, value)
+        return index < len(self.__values) and self.__values[index] == value
+
+
+    def bisect_left(self, value):
+        return bisect_left(self.__values, self.__probe(value))
+
+
+    def bisect_right(self, value):
+        return bisect_right(self.__values, self.__probe(value))
+
+
+    def index(self, value):
+        value = self.__probe(value)
+        index = bisect_left(self.__values, value)
+        if index < len(self.__values) and self.__values[index] == value:
+            return index
+        raise ValueError("{0}.index(x): x not in list".format(
+                         self.__class__.__name__))
+
+
+    def count(self, value):
+        value = self.__probe(value)
+        index = bisect_left(self.__values, value)
+        return bisect_right(self.__values, value, index) - index
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the values from minimum to maximum;
+        the arguments are as for SortedList.irange()
+        """
+        values = self.__values
+        start, stop = 0, len(values)
+        if minimum is not None:
+            bisect = bisect_left if inclusive[0] else bisect_right
+            start = bisect(values, self.__probe(minimum))
+        if maximum is not None:
+            bisect = bisect_right if inclusive[1] else bisect_left
+            stop = bisect(values, self.__probe(maximum))
+        return self.islice(start, max(start, stop), reverse)
+
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the values from index position start
+        up to but excluding stop
+        """
+        positions = range(*slice(start, stop).indices(len(self.__values)))
+        if reverse:
+            positions = reversed(positions)
+        return map(self.__values.__getitem__, positions)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
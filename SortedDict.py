@@ -47,9 +47,121 @@ False
 "{'E': 2, 'I': 3, 'N': 4, 'S': 5, 'V': 1}"
 """
 
+import collections.abc
+import copyreg
+import itertools
+
 from . import SortedList
 
 
+class _SortedView:
+    """The parts common to the SortedDict views: each holds the
+    dictionary and its sorted key index, so it reflects later changes
+    """
+
+    def __init__(self, mapping, keys):
+        self._mapping = mapping
+        self._keys = keys
+
+
+    def __len__(self):
+        return len(self._keys)
+
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, list(self))
+
+
+class SortedKeysView(_SortedView, collections.abc.KeysView):
+    """A set-like view of a SortedDict's keys in order that also
+    supports reversed() and indexing
+
+    >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+    >>> keys = d.keys()
+    >>> len(keys), keys[0], keys[-1], keys[1:3], "n" in keys
+    (6, 'a', 'y', ['i', 'n'], True)
+    >>> d["b"] = 0
+    >>> keys
+    SortedKeysView(['a', 'b', 'i', 'n', 's', 't', 'y'])
+    >>> list(reversed(keys))[:2], keys & {"a", "z"}
+    (['y', 't'], {'a'})
+    """
+
+    def __iter__(self):
+        return iter(self._keys)
+
+
+    def __reversed__(self):
+        return reversed(self._keys)
+
+
+    def __getitem__(self, index):
+        return self._keys[index]
+
+
+class SortedValuesView(_SortedView, collections.abc.ValuesView):
+    """A view of a SortedDict's values in key order that also supports
+    reversed() and indexing
+
+    >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+    >>> values = d.values()
+    >>> len(values), values[0], values[-2:], 5 in values
+    (6, 2, [5, 6], True)
+    >>> d["b"] = 0
+    >>> list(values), list(reversed(values))[:3]
+    ([2, 0, 4, 3, 1, 5, 6], [6, 5, 1])
+    """
+
+    def __iter__(self):
+        return map(dict.__getitem__, itertools.repeat(self._mapping),
+                   self._keys)
+
+
+    def __reversed__(self):
+        return map(dict.__getitem__, itertools.repeat(self._mapping),
+                   reversed(self._keys))
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [dict.__getitem__(self._mapping, key)
+                    for key in self._keys[index]]
+        return dict.__getitem__(self._mapping, self._keys[index])
+
+
+class SortedItemsView(_SortedView, collections.abc.ItemsView):
+    """A set-like view of a SortedDict's (key, value) items in key
+    order that also supports reversed() and indexing
+
+    >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+    >>> items = d.items()
+    >>> len(items), items[0], items[-2:], ("n", 3) in items
+    (6, ('a', 2), [('t', 5), ('y', 6)], True)
+    >>> del d["a"]
+    >>> items[0], next(reversed(items))
+    (('i', 4), ('y', 6))
+    """
+
+    def __iter__(self):
+        return zip(self._keys, map(dict.__getitem__,
+                                   itertools.repeat(self._mapping),
+                                   self._keys))
+
+
+    def __reversed__(self):
+        return zip(reversed(self._keys),
+                   map(dict.__getitem__, itertools.repeat(self._mapping),
+                       reversed(self._keys)))
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [(key, dict.__getitem__(self._mapping, key))
+                    for key in self._keys[index]]
+        key = self._keys[index]
+        return key, dict.__getitem__(self._mapping, key)
+
+
 class SortedDict(dict):
 
     def __init__(self, dictionary=None, key=None, **kwargs):
@@ -106,18 +218,27 @@ class SortedDict(dict):
         >>> d.update(e)
         >>> list(d.items())
         [('g', 9), ('p', 4), ('q', 5), ('s', 1), ('t', 5), ('z', 3)]
+        >>> d.update(dict(g=0, t=0), q=0)
+        >>> list(d.items())
+        [('g', 0), ('p', 4), ('q', 0), ('s', 1), ('t', 0), ('z', 3)]
         """
+        # Only keys that aren't already present go into the sorted key
+        # index, merged in one batch
+        new_keys = []
         if dictionary is None:
             pass
         elif isinstance(dictionary, dict):
+            new_keys.extend(key for key in dictionary if key not in self)
             super().update(dictionary)
         else:
             for key, value in dictionary.items():
+                if key not in self:
+                    new_keys.append(key)
                 super().__setitem__(key, value)
         if kwargs:
+            new_keys.extend(key for key in kwargs if key not in self)
             super().update(kwargs)
-        self.__keys = SortedList.SortedList(super().keys(),
-                                            self.__keys.key)
+        self.__keys.update(new_keys)
 
     @classmethod
     def fromkeys(cls, iterable, value=None, key=None):
@@ -135,6 +256,29 @@ class SortedDict(dict):
         return cls({k: value for k in iterable}, key)
 
 
+    @classmethod
+    def from_iterable(cls, items, key=None, workers=None,
+                      assume_sorted=False):
+        """A class method that returns a SortedDict of the given
+        dictionary or iterable of (key, value) pairs, sorting its keys
+        as SortedList.from_iterable() does
+
+        >>> pairs = ((str(i), i) for i in range(3000))
+        >>> d = SortedDict.from_iterable(pairs, workers=2)
+        >>> len(d), d.peekitem(0), d.peekitem(-1)
+        (3000, ('0', 0), ('999', 999))
+        >>> d = SortedDict.from_iterable([(1, "a"), (2, "b"), (2, "c")],
+        ...                              assume_sorted=True)
+        >>> list(d.items())
+        [(1, 'a'), (2, 'c')]
+        """
+        result = cls(key=key)
+        dict.update(result, items)
+        result.__keys = SortedList.SortedList.from_iterable(
+                dict.keys(result), key, workers, assume_sorted)
+        return result
+
+
     def value_at(self, index):
         """Returns the index-th item's value
 
@@ -170,6 +314,92 @@ class SortedDict(dict):
         self[self.__keys[index]] = value
 
 
+    def get_many(self, keys, default=None):
+        """Returns a list of the values for each of the keys, with
+        default for those not in the dictionary
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.get_many(["n", "x", "a"])
+        [3, None, 2]
+        >>> d.get_many("yz", 0)
+        [6, 0]
+        """
+        return list(map(super().get, keys, itertools.repeat(default)))
+
+
+    def bisect_left(self, key):
+        """Returns the index position of the first key not less than key
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.bisect_left("n"), d.bisect_left("o"), d.bisect_left("z")
+        (2, 3, 6)
+        """
+        return self.__keys.bisect_left(key)
+
+
+    def bisect_right(self, key):
+        """Returns the index position just past the last key not
+        greater than key
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.bisect_right("n"), d.bisect_right("o"), d.bisect_right("0")
+        (3, 3, 0)
+        """
+        return self.__keys.bisect_right(key)
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the keys from minimum to maximum;
+        the arguments are as for SortedList.irange()
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.irange("b", "s"))
+        ['i', 'n', 's']
+        >>> list(d.irange("n", inclusive=(False, True), reverse=True))
+        ['y', 't', 's']
+        """
+        return self.__keys.irange(minimum, maximum, inclusive, reverse)
+
+
+    def irange_items(self, minimum=None, maximum=None,
+                     inclusive=(True, True), reverse=False):
+        """Returns an iterator over the items whose keys are from
+        minimum to maximum; the arguments are as for irange()
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.irange_items("b", "s"))
+        [('i', 4), ('n', 3), ('s', 1)]
+        """
+        for key in self.__keys.irange(minimum, maximum, inclusive, reverse):
+            yield (key, self[key])
+
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the keys from index position start
+        up to but excluding stop
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.islice(1, 4))
+        ['i', 'n', 's']
+        >>> list(d.islice(-2, reverse=True))
+        ['y', 't']
+        """
+        return self.__keys.islice(start, stop, reverse)
+
+
+    def islice_items(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the items from index position start
+        up to but excluding stop
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.islice_items(1, 4))
+        [('i', 4), ('n', 3), ('s', 1)]
+        """
+        for key in self.__keys.islice(start, stop, reverse):
+            yield (key, self[key])
+
+
     def clear(self):
         """Removes every item from this SortedDict
         >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
@@ -253,43 +483,162 @@ class SortedDict(dict):
         return super().pop(key, args)
 
 
-    def popitem(self):
-        """Returns and removes an arbitrary item from the dictionary
+    def popitem(self, index=-1):
+        """Returns and removes the index-th item from the dictionary,
+        by default the one with the largest key
 
         >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
         >>> len(d)
         6
-        >>> item = d.popitem()
-        >>> item = d.popitem()
+        >>> d.popitem()
+        ('y', 6)
+        >>> d.popitem(0)
+        ('a', 2)
         >>> item = d.popitem()
         >>> len(d)
         3
+        >>> d.popitem(5)
+        Traceback (most recent call last):
+        ...
+        IndexError: pop index out of range
+        >>> SortedDict().popitem()
+        Traceback (most recent call last):
+        ...
+        KeyError: 'popitem(): dictionary is empty'
         """
-        item = super().popitem()
-        self.__keys.remove(item[0])
-        return item
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key = self.__keys.pop(index)
+        return key, super().pop(key)
+
+
+    def peekitem(self, index=-1):
+        """Returns the index-th item, by default the one with the
+        largest key, without removing it
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.peekitem(), d.peekitem(0), d.peekitem(2)
+        (('y', 6), ('a', 2), ('n', 3))
+        >>> d.peekitem(6)
+        Traceback (most recent call last):
+        ...
+        IndexError: list index out of range
+        """
+        key = self.__keys[index]
+        return key, self[key]
+
+
+    def index(self, key):
+        """Returns the index position of key in key order
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.index("a"), d.index("s")
+        (0, 3)
+        >>> d.index("X")
+        Traceback (most recent call last):
+        ...
+        KeyError: 'X'
+        """
+        try:
+            return self.__keys.index(key)
+        except ValueError:
+            raise KeyError(key)
+
+
+    def del_islice(self, start=None, stop=None):
+        """Deletes the items from index position start up to but
+        excluding stop, removing them from the key index in one go
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.del_islice(1, 3)
+        >>> list(d.items())
+        [('a', 2), ('s', 1), ('t', 5), ('y', 6)]
+        >>> d.del_islice(-2)
+        >>> list(d.items())
+        [('a', 2), ('s', 1)]
+        """
+        index = slice(start, stop)
+        for key in self.__keys[index]:
+            super().__delitem__(key)
+        del self.__keys[index]
+
+
+    def evict_before(self, key, inclusive=False):
+        """Removes the items whose keys are less than key, or not
+        greater than it if inclusive is True, and returns them as a
+        list of (key, value) pairs in key order
+
+        The keys are found with one bisection and removed with
+        del_islice(), so evicting k items takes O(k) time rather than
+        a bisection and a removal each.
+        >>> d = SortedDict({t: t * 10 for t in range(100, 110)})
+        >>> d.evict_before(103)
+        [(100, 1000), (101, 1010), (102, 1020)]
+        >>> d.evict_before(105, inclusive=True)
+        [(103, 1030), (104, 1040), (105, 1050)]
+        >>> d.evict_before(0), list(d)
+        ([], [106, 107, 108, 109])
+        """
+        if inclusive:
+            stop = self.__keys.bisect_right(key)
+        else:
+            stop = self.__keys.bisect_left(key)
+        items = list(self.islice_items(0, stop))
+        self.del_islice(0, stop)
+        return items
+
+
+    def instrument(self, callback=None, log=False, enabled=True):
+        """Starts counting the work done by the sorted key index, or
+        stops if enabled is False; the arguments are as for
+        SortedList.instrument()
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3), key=str.lower)
+        >>> d.instrument()
+        >>> d["B"] = 4
+        >>> d.update(dict(c=5, N=6))
+        >>> stats = d.stats()
+        >>> stats["key_calls"], stats["bisections"], stats["rebuilds"]
+        (3, 1, 1)
+        """
+        self.__keys.instrument(callback, log, enabled)
+
+
+    def stats(self):
+        """Returns the counts of the work done by the sorted key index
+        as SortedList.stats() does, or None if it isn't instrumented
+        """
+        return self.__keys.stats()
+
+
+    def keys(self):
+        """Returns a live view of the dictionary's keys in order
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.keys())
+        ['a', 'i', 'n', 's', 't', 'y']
+        """
+        return SortedKeysView(self, self.__keys)
 
 
     def values(self):
-        """Returns the dictionary's values in key order
+        """Returns a live view of the dictionary's values in key order
 
         >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
         >>> list(d.values())
         [2, 4, 3, 1, 5, 6]
         """
-        for key in self.__keys:
-            yield self[key]
+        return SortedValuesView(self, self.__keys)
 
 
     def items(self):
-        """Returns the dictionary's items in key order
+        """Returns a live view of the dictionary's items in key order
 
         >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
         >>> list(d.items())
         [('a', 2), ('i', 4), ('n', 3), ('s', 1), ('t', 5), ('y', 6)]
         """
-        for key in self.__keys:
-            yield (key, self[key])
+        return SortedItemsView(self, self.__keys)
 
 
     def __iter__(self):
@@ -303,7 +652,15 @@ class SortedDict(dict):
         """
         return iter(self.__keys)
 
-    keys = __iter__
+
+    def __reversed__(self):
+        """Returns a reverse iterator over the dictionary's keys
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(reversed(d))
+        ['y', 't', 's', 'n', 'i', 'a']
+        """
+        return reversed(self.__keys)
 
 
     def __delitem__(self, key):
@@ -377,6 +734,44 @@ class SortedDict(dict):
     __copy__ = copy
 
 
+    def __reduce__(self):
+        """Pickles the sorted key index and the values in key order, so
+        that unpickling neither sorts the keys nor adds them one by one,
+        and the attributes that a subclass has added; unpickling doesn't
+        call the constructor
+
+        >>> import pickle
+        >>> d = SortedDict(dict(V=1, E=2, I=3, N=4, S=5))
+        >>> e = pickle.loads(pickle.dumps(d))
+        >>> str(e)
+        "{'E': 2, 'I': 3, 'N': 4, 'S': 5, 'V': 1}"
+        >>> e["A"] = 0
+        >>> list(e.keys())
+        ['A', 'E', 'I', 'N', 'S', 'V']
+        >>> import copy
+        >>> class Tagged(SortedDict):
+        ...     def __init__(self, tag):
+        ...         super().__init__()
+        ...         self.tag = tag
+        >>> t = Tagged("x")
+        >>> t["b"], t["a"] = 2, 1
+        >>> u = copy.deepcopy(t)
+        >>> type(u).__name__, u.tag, list(u.items())
+        ('Tagged', 'x', [('a', 1), ('b', 2)])
+        """
+        attributes = {name: value for name, value in vars(self).items()
+                      if name != "_SortedDict__keys"}
+        return (copyreg.__newobj__, (self.__class__,),
+                (self.__keys, list(self.values()), attributes))
+
+
+    def __setstate__(self, state):
+        keys, values, attributes = state
+        self.__keys = keys
+        super().update(zip(keys, values))
+        vars(self).update(attributes)
+
+
 
 if __name__ == "__main__":
     import doctest
@@ -39,13 +39,144 @@ Traceback (most recent call last):
 ...
 AttributeError: 'SortedList' object has no attribute 'sort'
 
+>>> L = SortedList(range(5000, 0, -1))
+>>> for x in range(0, 5000, 2):
+...     L.add(x)
+>>> len(L), L[0], L[2500], L[-1], L.index(4000), L.count(4000)
+(7500, 0, 1667, 5000, 5999, 2)
+>>> del L[100:7000]
+>>> len(L), L[99:102]
+(600, [66, 4667, 4668])
+
 >>> import collections
 >>> isinstance(L, collections.Sequence)
 False
 """
 
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import operator
+from bisect import bisect_left, bisect_right
+
+log = logging.getLogger(__name__)
+
 _identity = lambda x: x
 
+_FROZEN = "a SortedList snapshot is read-only"
+
+# Values are kept in a list of sorted sublists; a sublist is split in two
+# once it grows beyond twice this length and merged into its neighbour
+# once it shrinks below half of it. Unless the key function is the
+# identity a parallel list of sublists caches each value's key so that
+# bisection runs on the keys alone and the key function is called only
+# once per value.
+#
+# copy() shares the sublists between the two lists rather than copying
+# them. A shared list copies the list of sublists on its first change and
+# then each sublist the first time it changes it.
+_LOAD = 1000
+
+# A batch of changes is made value by value while it is smaller than
+# 1 / _BATCH_RATIO of the list: each change shifts part of one sublist,
+# whereas rebuilding touches every value
+_BATCH_RATIO = 50
+
+
+def _one_by_one(count, size):
+    """Returns whether count changes to a container of size values
+    are cheaper made one at a time than by rebuilding it; the sorted
+    containers built on SortedList use this for their batch methods
+    """
+    return count * _BATCH_RATIO < size
+
+
+# from_iterable() starts with chunks of this many values when it can't
+# tell how many it will be given
+_FIRST_CHUNK = 16 * _LOAD
+
+
+def _chunks(iterable, workers):
+    """Yields the lists of values that SortedList.from_iterable()
+    sorts in parallel: workers equal chunks if the number of values is
+    known, and otherwise rounds of workers equal chunks that double in
+    size from one round to the next, so that there are few sorted runs
+    to merge and the largest round is still shared between the workers
+
+    >>> [len(chunk) for chunk in _chunks(list(range(100000)), 4)]
+    [25000, 25000, 25000, 25000]
+    >>> [len(chunk) for chunk in _chunks((i for i in range(200000)), 2)]
+    [16000, 16000, 32000, 32000, 64000, 40000]
+    """
+    hint = operator.length_hint(iterable)
+    size = max(_LOAD, -(-hint // workers)) if hint else _FIRST_CHUNK
+    iterator = iter(iterable)
+    while True:
+        for _ in range(workers):
+            chunk = list(itertools.islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
+        size *= 2
+
+
+def _sort_chunk(values, key):
+    """Returns the chunk of values in order and, if key isn't None,
+    their keys; run in a worker process by SortedList.from_iterable()
+    """
+    if key is None:
+        values.sort()
+        return values, None
+    keys = list(map(key, values))
+    order = sorted(range(len(values)), key=keys.__getitem__)
+    return [values[i] for i in order], [keys[i] for i in order]
+
+
+def _locate_left(maxes, keys, key):
+    """Returns the (sublist, offset) pair of the first key in the
+    sorted sublists of keys that is not less than key, given the
+    sublists' last keys; (0, 0) if there are none and the end of the
+    last sublist if key is greater than them all
+    """
+    pos = bisect_left(maxes, key)
+    if pos == len(maxes):
+        if not maxes:
+            return 0, 0
+        return pos - 1, len(keys[-1])
+    return pos, bisect_left(keys[pos], key)
+
+
+def _locate_right(maxes, keys, key):
+    """Returns the (sublist, offset) pair just past the last key in
+    the sorted sublists of keys that is not greater than key, as for
+    _locate_left()
+    """
+    pos = bisect_right(maxes, key)
+    if pos == len(maxes):
+        if not maxes:
+            return 0, 0
+        return pos - 1, len(keys[-1])
+    return pos, bisect_right(keys[pos], key)
+
+
+def _gallop(keys, key, lo, right=False):
+    """Returns what bisect_left(keys, key, lo) (or bisect_right())
+    would, probing exponentially further from lo first so that the
+    cost grows with the distance moved rather than with len(keys)
+    """
+    before = operator.le if right else operator.lt
+    size = len(keys)
+    step = 1
+    hi = lo
+    while hi < size and before(keys[hi], key):
+        lo = hi + 1
+        hi += step
+        step *= 2
+    bisect = bisect_right if right else bisect_left
+    return bisect(keys, key, lo, min(hi, size))
+
 
 class SortedList:
 
@@ -71,23 +202,281 @@ class SortedList:
         >>> L = SortedList(("the", "quick", "brown", "fox", "jumped"))
         >>> print(L)
         ['brown', 'fox', 'jumped', 'quick', 'the']
+        >>> calls = []
+        >>> def key(x):
+        ...     calls.append(x)
+        ...     return x.lower()
+        >>> L = SortedList(("the", "Quick", "brown", "Fox"), key)
+        >>> print(L)
+        ['brown', 'Fox', 'Quick', 'the']
+        >>> len(calls)
+        4
         """
-        self.__key = key or _identity
+        self.__key = self.__key_function = key or _identity
         assert hasattr(self.__key, "__call__")
+        self.__keyed = self.__key is not _identity
+        self.__frozen = False
+        # counts of the work done while instrumented, otherwise None
+        self.__stats = None
         if sequence is None:
-            self.__list = []
+            self.__build([])
         elif (isinstance(sequence, SortedList) and
-              sequence.key == self.__key):
-            self.__list = sequence.__list[:]
+              sequence.key == self.key):
+            sequence.flush()
+            self.__lists = sequence.__lists
+            self.__keys = sequence.__keys
+            self.__maxes = sequence.__maxes
+            self.__len = sequence.__len
+            self.__index = None
+            self.__owned = None
+            self.__share()
+            sequence.__share()
+        elif self.__keyed:
+            values = list(sequence)
+            keys = list(map(self.__key, values))
+            order = sorted(range(len(values)), key=keys.__getitem__)
+            self.__build([values[i] for i in order],
+                         [keys[i] for i in order])
+        else:
+            self.__build(sorted(sequence))
+
+
+    @classmethod
+    def from_iterable(cls, iterable, key=None, workers=None,
+                      assume_sorted=False):
+        """Returns a SortedList of the values from the iterable
+
+        If workers is greater than 1 that many processes sort chunks of
+        the values, which are then merged; the values and the key
+        function must be picklable. This pays off for large inputs
+        whose comparisons or key function are costly. Only a few
+        chunks are read ahead of the workers, so an iterator of values
+        isn't read into memory twice.
+        If assume_sorted is True the values must already be in order;
+        this is checked in a single pass instead of sorting them.
+        >>> L = SortedList.from_iterable(range(5000, 0, -1), workers=2)
+        >>> len(L), L[0], L[-1], L.index(4000)
+        (5000, 1, 5000, 3999)
+        >>> L = SortedList.from_iterable((i * 7919 % 40000
+        ...                               for i in range(40000)), workers=2)
+        >>> L[:3], L[-1], len(L)
+        ([0, 1, 2], 39999, 40000)
+        >>> L = SortedList.from_iterable(("the", "Quick", "brown", "Fox"),
+        ...                              str.lower, workers=2)
+        >>> print(L)
+        ['brown', 'Fox', 'Quick', 'the']
+        >>> L = SortedList.from_iterable(iter([-1, 3, 3, 8]),
+        ...                              assume_sorted=True)
+        >>> print(L)
+        [-1, 3, 3, 8]
+        >>> SortedList.from_iterable([-1, 8, 3], assume_sorted=True)
+        Traceback (most recent call last):
+        ...
+        ValueError: from_iterable(): values are not in order
+        """
+        if not assume_sorted and (not workers or workers < 2):
+            return cls(iterable, key)
+        result = cls(key=key)
+        keyed = result.__keyed
+        if assume_sorted:
+            values = (iterable if isinstance(iterable, list)
+                      else list(iterable))
+            keys = list(map(key, values)) if keyed else values
+            if any(map(operator.gt, keys, itertools.islice(keys, 1, None))):
+                raise ValueError("from_iterable(): values are not in order")
+            result.__build(values, keys if keyed else None)
+            return result
+        values, keys = [], []
+
+        def gather(future):
+            chunk, chunk_keys = future.result()
+            values.extend(chunk)
+            if keyed:
+                keys.extend(chunk_keys)
+
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            # Chunks are submitted as the workers free up, at most one
+            # ahead of them, and gathered in input order
+            pending = collections.deque()
+            for chunk in _chunks(iterable, workers):
+                pending.append(executor.submit(_sort_chunk, chunk,
+                                               key if keyed else None))
+                if len(pending) > workers:
+                    gather(pending.popleft())
+            while pending:
+                gather(pending.popleft())
+        # The chunks are a few sorted runs in input order, which the
+        # sort finds and merges, keeping equal keys in input order
+        if keyed:
+            order = sorted(range(len(values)), key=keys.__getitem__)
+            result.__build([values[i] for i in order],
+                           [keys[i] for i in order])
+        else:
+            values.sort()
+            result.__build(values)
+        return result
+
+
+    def __build(self, values, keys=None):
+        """Replaces the contents of the list with the given values
+        which must already be in order; keys are the values' keys
+        and are computed if not given
+        """
+        if self.__frozen:
+            raise TypeError(_FROZEN)
+        self.__lists = [values[i:i + _LOAD]
+                        for i in range(0, len(values), _LOAD)]
+        if not self.__keyed:
+            self.__keys = self.__lists
         else:
-            self.__list = sorted(list(sequence), key=self.__key)
+            if keys is None:
+                keys = list(map(self.__key, values))
+            self.__keys = [keys[i:i + _LOAD]
+                           for i in range(0, len(keys), _LOAD)]
+        self.__maxes = [sublist[-1] for sublist in self.__keys]
+        self.__len = len(values)
+        # Fenwick tree over the sublist lengths; it is built on demand by
+        # the positional methods and dropped whenever sublists are split,
+        # merged or removed
+        self.__index = None
+        self.__private()
+        if self.__stats is not None:
+            self.__event("rebuild")
+
+
+    def __private(self):
+        """Records that this list doesn't share any of its storage
+        """
+        self.__plain = True
+        self.__shared = False
+        # ids of the sublists made since the list of sublists was last
+        # copied, which are therefore not shared; None if all are private
+        self.__owned = None
+
+
+    def __share(self):
+        """Records that this list's storage is shared with a copy
+        """
+        self.__plain = False
+        self.__shared = True
+
+
+    def __prepare(self, *positions):
+        """Makes the list of sublists, and the sublists at the given
+        positions, private to this list before they are changed; only
+        needed unless __plain is True
+        """
+        if self.__frozen:
+            raise TypeError(_FROZEN)
+        if self.__shared:
+            self.__lists = self.__lists[:]
+            self.__keys = self.__keys[:] if self.__keyed else self.__lists
+            self.__maxes = self.__maxes[:]
+            self.__owned = set()
+            self.__shared = False
+        owned = self.__owned
+        for pos in positions:
+            if id(self.__lists[pos]) not in owned:
+                for store in self.__stores():
+                    store[pos] = store[pos][:]
+                owned.add(id(self.__lists[pos]))
 
 
     @property
     def key(self):
         """Return the key function used by this list
         """
-        return self.__key
+        return self.__key_function
+
+
+    def instrument(self, callback=None, log=False, enabled=True):
+        """Starts counting the work this list does, or stops if enabled
+        is False; stats() returns the counts
+
+        The counts are of calls of the key function (if the list has
+        one), bisections and their estimated steps, values moved along
+        sublists by insertions and deletions, and sublists split,
+        merged or rebuilt. After each split, merge or rebuild callback,
+        if given, is called with the event's name and stats(), and if
+        log is True the event is logged at DEBUG level.
+        Instrumenting again restarts the counts; a list that isn't
+        instrumented only checks one attribute on each insertion,
+        deletion and bisection.
+        >>> L = SortedList(range(2000), key=lambda x: -x)
+        >>> events = []
+        >>> L.instrument(lambda event, stats: events.append(event))
+        >>> for x in range(1200):
+        ...     L.add(x % 1000)
+        >>> stats = L.stats()
+        >>> stats["key_calls"], stats["bisections"], stats["splits"]
+        (1200, 1200, 1)
+        >>> stats["moves"] > 0, events
+        (True, ['split'])
+        >>> L.update(range(5000))
+        >>> L.stats()["rebuilds"], events[-1]
+        (1, 'rebuild')
+        >>> L.instrument(enabled=False)
+        >>> L.stats() is None
+        True
+        """
+        if not enabled:
+            self.__stats = None
+            self.__key = self.__key_function
+            return
+        stats = dict.fromkeys(("key_calls", "bisections", "bisect_steps",
+                               "moves", "splits", "merges", "rebuilds"), 0)
+        self.__stats = stats
+        self.__sinks = callback, log
+        if self.__keyed:
+            key = self.__key_function
+
+            def counted(value):
+                stats["key_calls"] += 1
+                return key(value)
+
+            self.__key = counted
+        else:
+            self.__key = self.__key_function
+
+
+    def stats(self):
+        """Returns a dict of the counts since instrument() was called,
+        with the list's current length and number of sublists, or None
+        if the list isn't instrumented
+        """
+        if self.__stats is None:
+            return None
+        return dict(self.__stats, length=self.__len,
+                    sublists=len(self.__lists))
+
+
+    def __event(self, name):
+        """Counts a split, merge or rebuild and reports it
+        """
+        self.__stats[name + "s"] += 1
+        callback, logged = self.__sinks
+        if logged:
+            log.debug("SortedList at %#x: %s; %s", id(self), name,
+                      self.stats())
+        if callback is not None:
+            callback(name, self.stats())
+
+
+    def __count_found(self, found):
+        """Counts the bisection that found the (sublist, offset) pair
+        """
+        if self.__maxes:
+            self.__count_bisections(1, self.__keys[found[0]])
+
+
+    def __count_bisections(self, count, sublist):
+        """Counts count bisections of the sublists' maximums followed
+        by bisections of the given sublist
+        """
+        stats = self.__stats
+        stats["bisections"] += count
+        stats["bisect_steps"] += count * (len(self.__maxes).bit_length() +
+                                          len(sublist).bit_length())
 
 
     def clear(self):
@@ -100,22 +489,237 @@ class SortedList:
         >>> print(L)
         []
         """
-        self.__list = []
+        self.__build([])
+
+
+    def __build_index(self):
+        """Builds the Fenwick tree over the sublist lengths
+        """
+        tree = [len(sublist) for sublist in self.__lists]
+        size = len(tree)
+        for i in range(size):
+            parent = i | (i + 1)
+            if parent < size:
+                tree[parent] += tree[i]
+        self.__index = tree
 
 
-    def __bisect_left(self, value):
-        """Returns value's index position in the list
-        (or where value belongs if it isn't in the list)
+    def __update_index(self, pos, delta):
+        """Adds delta to the length recorded for the pos-th sublist
         """
+        tree = self.__index
+        if tree is None:
+            return
+        size = len(tree)
+        while pos < size:
+            tree[pos] += delta
+            pos |= pos + 1
+
+
+    def __offset(self, pos):
+        """Returns the index position of the pos-th sublist's first value
+        """
+        if pos == 0:
+            return 0
+        if pos == len(self.__lists):
+            return self.__len
+        if self.__index is None:
+            self.__build_index()
+        tree = self.__index
+        total = 0
+        pos -= 1
+        while pos >= 0:
+            total += tree[pos]
+            pos = (pos & (pos + 1)) - 1
+        return total
+
+
+    def __locate(self, index):
+        """Returns the (sublist, offset) pair holding the index-th value;
+        index must be a non-negative in-range index position
+        """
+        lists = self.__lists
+        if index < len(lists[0]):
+            return 0, index
+        last = len(lists[-1])
+        if index >= self.__len - last:
+            return len(lists) - 1, index - self.__len + last
+        if self.__index is None:
+            self.__build_index()
+        tree = self.__index
+        size = len(tree)
+        pos = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            upper = pos + step
+            if upper <= size and tree[upper - 1] <= index:
+                pos = upper
+                index -= tree[upper - 1]
+            step >>= 1
+        return pos, index
+
+
+    def __normalize(self, index, message):
+        """Returns index as a non-negative in-range index position
+        or raises IndexError with the given message
+        """
+        if index < 0:
+            index += self.__len
+        if not 0 <= index < self.__len:
+            raise IndexError(message)
+        return index
+
+
+    def __bisect_left(self, key):
+        """Returns the (sublist, offset) pair of the position of the
+        first value whose key is not less than key (or where such a
+        value belongs if there is none)
+        """
+        found = _locate_left(self.__maxes, self.__keys, key)
+        if self.__stats is not None:
+            self.__count_found(found)
+        return found
+
+
+    def __bisect_right(self, key):
+        """Returns the (sublist, offset) pair of the position just past
+        the last value whose key is not greater than key
+        """
+        found = _locate_right(self.__maxes, self.__keys, key)
+        if self.__stats is not None:
+            self.__count_found(found)
+        return found
+
+
+    def __find(self, value):
+        """Returns the (sublist, offset) pair of value's first
+        occurrence or None if value isn't in the list
+        """
+        if not self.__keyed:
+            # Equal keys are equal values, so only one needs checking
+            pos, idx = self.__bisect_left(value)
+            lists = self.__lists
+            if (pos < len(lists) and idx < len(lists[pos]) and
+                    lists[pos][idx] == value):
+                return pos, idx
+            return None
         key = self.__key(value)
-        left, right = 0, len(self.__list)
-        while left < right:
-            middle = (left + right) // 2
-            if self.__key(self.__list[middle]) < key:
-                left = middle + 1
-            else:
-                right = middle
-        return left
+        pos, idx = self.__bisect_left(key)
+        return self.__scan(value, key, pos, idx)
+
+
+    def __scan(self, value, key, pos, idx):
+        """Returns the (sublist, offset) pair of value's first occurrence
+        at or after the given pair, where the run of values whose key is
+        key begins, or None if value isn't in the run
+        """
+        lists, keys = self.__lists, self.__keys
+        while pos < len(lists):
+            sublist, subkeys = lists[pos], keys[pos]
+            while idx < len(sublist):
+                if sublist[idx] == value:
+                    return pos, idx
+                if key < subkeys[idx]:
+                    return None
+                idx += 1
+            pos, idx = pos + 1, 0
+        return None
+
+
+    def __insert(self, pos, idx, value, key):
+        """Inserts value, whose key is key, at the (sublist, offset) pair
+        """
+        if not self.__plain:
+            self.__prepare(*([pos] if self.__lists else []))
+        lists = self.__lists
+        self.__len += 1
+        if not lists:
+            lists.append([value])
+            if self.__keyed:
+                self.__keys.append([key])
+            self.__maxes.append(key)
+            self.__index = None
+            return
+        sublist = lists[pos]
+        sublist.insert(idx, value)
+        if self.__keyed:
+            self.__keys[pos].insert(idx, key)
+        if idx == len(sublist) - 1:
+            self.__maxes[pos] = key
+        if self.__stats is not None:
+            self.__stats["moves"] += len(sublist) - idx - 1
+        if len(sublist) > 2 * _LOAD:
+            self.__split(pos)
+        else:
+            self.__update_index(pos, 1)
+
+
+    def __split(self, pos):
+        """Splits the pos-th sublist in two
+        """
+        for store in self.__stores():
+            sublist = store[pos]
+            store.insert(pos + 1, sublist[_LOAD:])
+            del sublist[_LOAD:]
+        if self.__owned is not None:
+            self.__owned.add(id(self.__lists[pos + 1]))
+        self.__maxes[pos] = self.__keys[pos][-1]
+        self.__maxes.insert(pos + 1, self.__keys[pos + 1][-1])
+        self.__index = None
+        if self.__stats is not None:
+            self.__event("split")
+
+
+    def __stores(self):
+        """Returns the lists of sublists that must be kept in step:
+        the values and, for a list with a key function, the keys
+        """
+        if self.__keyed:
+            return self.__lists, self.__keys
+        return self.__lists,
+
+
+    def __delete(self, pos, idx):
+        """Deletes the value at the (sublist, offset) pair
+        """
+        if not self.__plain:
+            self.__prepare(pos)
+        for store in self.__stores():
+            del store[pos][idx]
+        self.__len -= 1
+        lists = self.__lists
+        if self.__stats is not None:
+            self.__stats["moves"] += len(lists[pos]) - idx
+        if not lists[pos]:
+            for store in self.__stores():
+                del store[pos]
+            del self.__maxes[pos]
+            self.__index = None
+            return
+        self.__maxes[pos] = self.__keys[pos][-1]
+        if len(lists[pos]) < _LOAD // 2 and len(lists) > 1:
+            self.__merge(pos)
+        else:
+            self.__update_index(pos, -1)
+
+
+    def __merge(self, pos):
+        """Merges the pos-th sublist into a neighbour, splitting the
+        result again if it ends up too long
+        """
+        if pos == 0:
+            pos = 1
+        if not self.__plain:
+            self.__prepare(pos - 1)
+        for store in self.__stores():
+            store[pos - 1].extend(store[pos])
+            del store[pos]
+        del self.__maxes[pos - 1]
+        self.__index = None
+        if self.__stats is not None:
+            self.__event("merge")
+        if len(self.__lists[pos - 1]) > 2 * _LOAD:
+            self.__split(pos - 1)
 
 
     def add(self, value):
@@ -132,11 +736,60 @@ class SortedList:
         >>> print(L)
         [-18, -1, 3, 4, 5, 5, 5, 7, 8, 22, 99]
         """
-        index = self.__bisect_left(value)
-        if index == len(self.__list):
-            self.__list.append(value)
-        else:
-            self.__list.insert(index, value)
+        key = self.__key(value) if self.__keyed else value
+        pos, idx = self.__bisect_left(key)
+        self.__insert(pos, idx, value, key)
+
+
+    def update(self, iterable):
+        """Adds every value from the iterable to the list
+
+        Small batches are added one by one; larger ones are sorted
+        and merged with the existing values in a single pass.
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> L.update([7, 5, -18])
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 7, 8, 22]
+        >>> L.update(range(0, 30, 3))
+        >>> print(L)
+        [-18, -1, 0, 3, 3, 4, 5, 5, 6, 7, 8, 9, 12, 15, 18, 21, 22, 24, 27]
+        >>> L = SortedList(range(0, 5000, 2))
+        >>> L.add_many(range(5000, 0, -2))
+        >>> len(L), L[:4], L[-4:]
+        (5000, [0, 2, 2, 4], [4996, 4998, 4998, 5000])
+        """
+        values = list(iterable)
+        if _one_by_one(len(values), self.__len):
+            # Added in place rather than by self.add(), which a subclass
+            # may override to defer the work
+            keyed = self.__keyed
+            for value in values:
+                key = self.__key(value) if keyed else value
+                pos, idx = self.__bisect_left(key)
+                self.__insert(pos, idx, value, key)
+        elif self.__keyed:
+            keys = list(map(self.__key, values))
+            keys.extend(itertools.chain.from_iterable(self.__keys))
+            values.extend(self)
+            order = sorted(range(len(values)), key=keys.__getitem__)
+            self.__build([values[i] for i in order],
+                         [keys[i] for i in order])
+        elif values:
+            values.extend(self)
+            values.sort()
+            self.__build(values)
+
+    add_many = update
+
+
+    def flush(self):
+        """Puts any values that were added but not yet placed in order
+        into the list
+
+        Values are always placed as they are added here, so this does
+        nothing; subclasses that defer adds, such as BufferedSortedList,
+        override it, and lists that read another's storage call it first.
+        """
 
 
     def pop(self, index=-1):
@@ -158,7 +811,13 @@ class SortedList:
         ...
         IndexError: pop index out of range
         """
-        return self.__list.pop(index)
+        if not self.__len:
+            raise IndexError("pop from empty list")
+        pos, idx = self.__locate(
+                self.__normalize(index, "pop index out of range"))
+        value = self.__lists[pos][idx]
+        self.__delete(pos, idx)
+        return value
 
 
     def remove(self, value):
@@ -176,13 +835,16 @@ class SortedList:
         >>> L.remove(99)
         >>> print(L)
         [-1, 3, 4, 5, 7, 8, 22]
+        >>> L = SortedList(["b", "A", "a", "B"], key=str.lower)
+        >>> L.remove("a")
+        >>> print(L)
+        ['A', 'b', 'B']
         """
-        index = self.__bisect_left(value)
-        if index < len(self.__list) and self.__list[index] == value:
-            del self.__list[index]
-        else:
+        found = self.__find(value)
+        if found is None:
             raise ValueError("{0}.remove(x): x not in list".format(
                              self.__class__.__name__))
+        self.__delete(*found)
 
 
     def remove_every(self, value):
@@ -202,13 +864,28 @@ class SortedList:
         6
         >>> print(L)
         [-18, -1, 3, 4, 8, 22, 99]
+        >>> L = SortedList(["b", "A", "a", "B", "a"], key=str.lower)
+        >>> L.remove_every("a")
+        2
+        >>> print(L)
+        ['A', 'b', 'B']
         """
-        count = 0
-        index = self.__bisect_left(value)
-        while (index < len(self.__list) and
-               self.__list[index] == value):
-            del self.__list[index]
-            count += 1
+        key = self.__key(value)
+        start, stop = self.__span(key, key)
+        first = self.__offset(start[0]) + start[1]
+        last = self.__offset(stop[0]) + stop[1]
+        if not self.__keyed:
+            kept = []
+        else:
+            # Values with an equal key but unequal to value are put back
+            kept = [other for other in self.__iter_between(start, stop)
+                    if other != value]
+        count = last - first - len(kept)
+        if count:
+            self.__delete_range(first, last)
+            for other in reversed(kept):
+                pos, idx = self.__bisect_left(key)
+                self.__insert(pos, idx, other, key)
         return count
 
 
@@ -222,14 +899,149 @@ class SortedList:
         1
         >>> L.count(-17)
         0
+        >>> L = SortedList(["b", "A", "a", "B", "a"], key=str.lower)
+        >>> L.count("a"), L.count("A"), L.count("c")
+        (2, 1, 0)
         """
-        count = 0
-        index = self.__bisect_left(value)
-        while (index < len(self.__list) and
-               self.__list[index] == value):
-            index += 1
-            count += 1
-        return count
+        key = self.__key(value)
+        start, stop = self.__span(key, key)
+        if self.__keyed:
+            return sum(1 for other in self.__iter_between(start, stop)
+                       if other == value)
+        return (self.__offset(stop[0]) + stop[1] -
+                self.__offset(start[0]) - start[1])
+
+
+    def __bisect_many(self, keys, right=False):
+        """Returns the (sublist, offset) pairs that __bisect_left() (or
+        __bisect_right()) returns for each of the keys
+
+        The keys are bisected in sorted order, each search starting
+        where the previous one ended.
+        """
+        if not self.__len:
+            return [(0, 0)] * len(keys)
+        bisect = bisect_right if right else bisect_left
+        maxes, subkeys = self.__maxes, self.__keys
+        if self.__stats is not None:
+            # Each search starts where the previous one ended, so this
+            # overestimates the steps
+            self.__count_bisections(len(keys), subkeys[0])
+        last = len(maxes) - 1
+        end = last, len(subkeys[last])
+        result = [end] * len(keys)
+        pos = idx = 0
+        for i in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[i]
+            lower = bisect(maxes, key, pos)
+            if lower > last:
+                break
+            if lower != pos:
+                pos, idx = lower, 0
+            idx = bisect(subkeys[pos], key, idx)
+            result[i] = pos, idx
+        return result
+
+
+    def __offsets(self):
+        """Returns the index position of each sublist's first value
+        """
+        return list(itertools.accumulate(map(len, self.__lists),
+                                         initial=0))
+
+
+    def contains_many(self, values):
+        """Returns a list saying for each of the values whether it is
+        in the list
+
+        The values are looked up in sorted order in one pass, which is
+        much faster than using "in" for each of them.
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.contains_many([5, 0, 99, 100, -18])
+        [True, False, True, False, True]
+        >>> L = SortedList(["b", "A", "a", "B"], key=str.lower)
+        >>> L.contains_many(["B", "c", "a"])
+        [True, False, True]
+        """
+        return [found is not None for found in self.__find_many(values)]
+
+
+    def index_many(self, values):
+        """Returns a list of the index position of the first occurrence
+        of each of the values, with None for those not in the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.index_many([5, 0, 99, -18])
+        [7, None, 12, 0]
+        """
+        offsets = self.__offsets()
+        return [None if found is None else offsets[found[0]] + found[1]
+                for found in self.__find_many(values)]
+
+
+    def __find_many(self, values):
+        """Returns what __find() returns for each of the values
+        """
+        values = list(values)
+        keys = list(map(self.__key, values))
+        lists = self.__lists
+        result = []
+        for value, key, (pos, idx) in zip(values, keys,
+                                          self.__bisect_many(keys)):
+            if not self.__keyed:
+                if pos < len(lists) and idx < len(lists[pos]) and (
+                        lists[pos][idx] == value):
+                    result.append((pos, idx))
+                else:
+                    result.append(None)
+            else:
+                result.append(self.__scan(value, key, pos, idx))
+        return result
+
+
+    def count_many(self, values):
+        """Returns a list of the number of occurrences of each of the
+        values
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.count_many([5, 0, 3, 99])
+        [2, 0, 2, 1]
+        >>> L = SortedList(["b", "A", "a", "B", "a"], key=str.lower)
+        >>> L.count_many(["a", "c", "B"])
+        [2, 0, 1]
+        """
+        values = list(values)
+        keys = list(map(self.__key, values))
+        starts = self.__bisect_many(keys)
+        stops = self.__bisect_many(keys, right=True)
+        if self.__keyed:
+            return [sum(1 for other in self.__iter_between(start, stop)
+                        if other == value)
+                    for value, start, stop in zip(values, starts, stops)]
+        offsets = self.__offsets()
+        return [offsets[stop[0]] + stop[1] - offsets[start[0]] - start[1]
+                for start, stop in zip(starts, stops)]
+
+
+    def count_range(self, minimum=None, maximum=None,
+                    inclusive=(True, True)):
+        """Counts the values from minimum to maximum without visiting
+        them; the arguments are as for irange()
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99])
+        >>> L.count_range(3, 7), L.count_range(3, 7, (False, False))
+        (7, 5)
+        >>> L.count_range(maximum=0), L.count_range(100)
+        (2, 0)
+        """
+        if not self.__len:
+            return 0
+        key = self.__key
+        start, stop = self.__span(
+                None if minimum is None else key(minimum),
+                None if maximum is None else key(maximum), inclusive)
+        return max(self.__offset(stop[0]) + stop[1] -
+                   self.__offset(start[0]) - start[1], 0)
 
 
     def index(self, value):
@@ -245,13 +1057,397 @@ class SortedList:
         >>> L.index(99)
         12
         """
-        index = self.__bisect_left(value)
-        if index < len(self.__list) and self.__list[index] == value:
-            return index
+        found = self.__find(value)
+        if found is not None:
+            return self.__offset(found[0]) + found[1]
         raise ValueError("{0}.index(x): x not in list".format(
                          self.__class__.__name__))
 
 
+    def bisect_left(self, value):
+        """Returns the index position of the first value not less than
+        value, i.e., where value would be inserted ahead of any equal
+        values
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.bisect_left(5), L.bisect_left(6), L.bisect_left(-20)
+        (7, 9, 0)
+        >>> L.bisect_left(100)
+        13
+        """
+        return self.bisect_key_left(self.__key(value))
+
+
+    def bisect_right(self, value):
+        """Returns the index position just past the last value not
+        greater than value
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.bisect_right(5), L.bisect_right(6), L.bisect_right(-20)
+        (9, 9, 0)
+        >>> L.bisect_right(99)
+        13
+        """
+        return self.bisect_key_right(self.__key(value))
+
+
+    def bisect_key_left(self, key):
+        """Returns the index position of the first value whose key is
+        not less than key
+
+        >>> L = SortedList(["b", "A", "a", "B", "c"], key=str.lower)
+        >>> L.bisect_key_left("b"), L.bisect_key_left("bb")
+        (2, 4)
+        """
+        pos, idx = self.__bisect_left(key)
+        return self.__offset(pos) + idx
+
+
+    def bisect_key_right(self, key):
+        """Returns the index position just past the last value whose
+        key is not greater than key
+
+        >>> L = SortedList(["b", "A", "a", "B", "c"], key=str.lower)
+        >>> L.bisect_key_right("b"), L.bisect_key_right("")
+        (4, 0)
+        """
+        pos, idx = self.__bisect_right(key)
+        return self.__offset(pos) + idx
+
+
+    def rank(self, value):
+        """Returns the number of values less than value, which need not
+        be in the list
+
+        Like select(), percentile() and median() this runs in O(log n)
+        time using the running counts of the values in each sublist.
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.rank(5), L.rank(6), L.rank(-20), L.rank(1000)
+        (7, 9, 0, 13)
+        """
+        return self.bisect_left(value)
+
+
+    def select(self, k):
+        """Returns the value of rank k, i.e., the k-th smallest value
+        counting from 0
+
+        >>> L = SortedList(range(5000, 0, -1))
+        >>> L.select(0), L.select(2500), L.select(-1)
+        (1, 2501, 5000)
+        >>> L.select(5000)
+        Traceback (most recent call last):
+        ...
+        IndexError: select(): rank out of range
+        """
+        index = self.__normalize(k, "select(): rank out of range")
+        pos, idx = self.__locate(index)
+        return self.__lists[pos][idx]
+
+
+    def percentile(self, p):
+        """Returns the nearest-rank p-th percentile, the smallest value
+        that at least p percent of the values are less than or equal to
+
+        >>> L = SortedList((15, 20, 35, 40, 50))
+        >>> L.percentile(5), L.percentile(30), L.percentile(40)
+        (15, 20, 20)
+        >>> L.percentile(50), L.percentile(100)
+        (35, 50)
+        >>> L = SortedList(range(1, 1001))
+        >>> L.percentile(99), L.percentile(99.9), L.percentile(0)
+        (990, 999, 1)
+        """
+        if not 0 <= p <= 100:
+            raise ValueError("percentile(): p must be from 0 to 100")
+        if not self.__len:
+            raise IndexError("percentile(): list is empty")
+        # ceil(p * n / 100) in integer arithmetic where p allows it
+        rank = -(-p * self.__len // 100)
+        return self.select(max(int(rank), 1) - 1)
+
+
+    def median(self):
+        """Returns the middle value, or the mean of the two middle
+        values if the list's length is even
+
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> L.median()
+        4.5
+        >>> L.add(30)
+        >>> L.median()
+        5
+        >>> SortedList().median()
+        Traceback (most recent call last):
+        ...
+        IndexError: median(): list is empty
+        """
+        if not self.__len:
+            raise IndexError("median(): list is empty")
+        half = self.__len // 2
+        if self.__len % 2:
+            return self.select(half)
+        return (self.select(half - 1) + self.select(half)) / 2
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the values from minimum to maximum
+
+        A minimum or maximum of None leaves that end of the range open;
+        inclusive says whether each end of the range is included. The
+        values are produced lazily, so only those in the range are
+        visited.
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> list(L.irange(3, 7))
+        [3, 3, 4, 5, 5, 7]
+        >>> list(L.irange(3, 7, inclusive=(False, False)))
+        [4, 5, 5]
+        >>> list(L.irange(maximum=2, reverse=True))
+        [2, 1, -1, -18]
+        >>> list(L.irange(23))
+        [99]
+        >>> list(L.irange(100))
+        []
+        """
+        key = self.__key
+        return self.irange_key(
+                None if minimum is None else key(minimum),
+                None if maximum is None else key(maximum),
+                inclusive, reverse)
+
+
+    def irange_key(self, min_key=None, max_key=None, inclusive=(True, True),
+                   reverse=False):
+        """Returns an iterator over the values whose keys are from
+        min_key to max_key; the arguments are as for irange()
+
+        >>> L = SortedList(["b", "A", "a", "B", "c"], key=str.lower)
+        >>> list(L.irange_key("a", "b"))
+        ['A', 'a', 'b', 'B']
+        >>> list(L.irange_key("a", "b", (False, True), reverse=True))
+        ['B', 'b']
+        """
+        if not self.__len:
+            return iter(())
+        start, stop = self.__span(min_key, max_key, inclusive)
+        return self.__iter_between(start, stop, reverse)
+
+
+    def __span(self, min_key, max_key, inclusive=(True, True)):
+        """Returns the (sublist, offset) pairs of the first value whose
+        key is in the range and of the position just past the last one;
+        a key of None leaves that end of the range open
+        """
+        if min_key is None:
+            start = 0, 0
+        elif inclusive[0]:
+            start = self.__bisect_left(min_key)
+        else:
+            start = self.__bisect_right(min_key)
+        if max_key is None:
+            stop = self.__bisect_right(self.__maxes[-1])
+        elif inclusive[1]:
+            stop = self.__bisect_right(max_key)
+        else:
+            stop = self.__bisect_left(max_key)
+        return start, stop
+
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the values from index position start
+        up to but excluding stop, without copying them into a new list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> list(L.islice(2, 6))
+        [1, 2, 3, 3]
+        >>> list(L.islice(-3, reverse=True))
+        [99, 22, 8]
+        >>> list(L.islice(8, 2))
+        []
+        """
+        start, stop, step = slice(start, stop).indices(self.__len)
+        if start >= stop:
+            return iter(())
+        last, last_idx = self.__locate(stop - 1)
+        return self.__iter_between(self.__locate(start),
+                                   (last, last_idx + 1), reverse)
+
+
+    def __iter_between(self, start, stop, reverse=False):
+        """Returns an iterator over the values from the (sublist, offset)
+        pair start up to but excluding the pair stop
+        """
+        if not self.__lists:
+            return
+        first, first_idx = start
+        last, last_idx = stop
+        positions = range(first, last + 1)
+        if reverse:
+            positions = reversed(positions)
+        for pos in positions:
+            sublist = self.__lists[pos]
+            low = first_idx if pos == first else 0
+            high = last_idx if pos == last else len(sublist)
+            if low < high:
+                if reverse:
+                    yield from reversed(sublist[low:high])
+                else:
+                    yield from sublist[low:high]
+
+
+    @staticmethod
+    def merge(*lists):
+        """Returns an iterator over the values of all the given
+        SortedLists in order, merging them lazily as it goes
+
+        The lists must share a key function; values with equal keys
+        come in the order of the lists they are from.
+        >>> a = SortedList((5, 8, -1, 3))
+        >>> b = SortedList((4, 22, 5))
+        >>> list(SortedList.merge(a, b, SortedList()))
+        [-1, 3, 4, 5, 5, 8, 22]
+        >>> a = SortedList(("the", "Quick", "brown", "fox"), str.lower)
+        >>> b = SortedList(("Brown", "dog", "The"), str.lower)
+        >>> list(SortedList.merge(a, b))
+        ['brown', 'Brown', 'dog', 'fox', 'Quick', 'the', 'The']
+        >>> list(SortedList.merge(a, SortedList()))
+        Traceback (most recent call last):
+        ...
+        ValueError: merge(): the lists have different key functions
+        """
+        if len({sorted_list.key for sorted_list in lists}) > 1:
+            raise ValueError("merge(): the lists have different key "
+                             "functions")
+        for sorted_list in lists:
+            sorted_list.flush()
+        if not lists or not lists[0].__keyed:
+            return heapq.merge(*lists)
+        pairs = (zip(itertools.chain.from_iterable(sorted_list.__keys),
+                     sorted_list) for sorted_list in lists)
+        return map(operator.itemgetter(1),
+                   heapq.merge(*pairs, key=operator.itemgetter(0)))
+
+
+    def union(self, other):
+        """Returns a new SortedList of the values in this list or in
+        other, or in both
+
+        These set operations treat the lists as multisets in which
+        values with equal keys are equal: a value that is in this
+        list m times and in other n times is in the union max(m, n)
+        times, taking this list's values first. other is converted
+        to a SortedList using this list's key function if it isn't
+        one already; the result has this list's key function.
+        Both lists are copied into flat lists and walked in step,
+        galloping over stretches that only one of them has, so this
+        takes O(len(self) + len(other)) time; when one list is much
+        smaller galloping saves comparisons (there are O(m log(n / m))
+        for lists of m and n values), not copying.
+        >>> a = SortedList((1, 2, 2, 2, 5, 7))
+        >>> print(a.union((2, 3, 5, 5, 8)))
+        [1, 2, 2, 2, 3, 5, 5, 7, 8]
+        >>> a = SortedList(("a", "B", "c"), str.lower)
+        >>> print(a.union(("A", "b", "b")))
+        ['a', 'B', 'b', 'c']
+        """
+        return self.__combine(other, True, True,
+                              lambda m, n: (0, m, m, n))
+
+
+    def intersection(self, other):
+        """Returns a new SortedList of the values in both this list
+        and other; a value is in the result min(m, n) times
+
+        >>> a = SortedList((1, 2, 2, 2, 5, 7))
+        >>> print(a.intersection((2, 3, 5, 5, 8, 2)))
+        [2, 2, 5]
+        >>> print(a.intersection(range(1000, 100000)))
+        []
+        """
+        return self.__combine(other, False, False,
+                              lambda m, n: (0, min(m, n), 0, 0))
+
+
+    def difference(self, other):
+        """Returns a new SortedList of the values in this list that
+        aren't in other; a value is in the result max(m - n, 0) times
+
+        >>> a = SortedList((1, 2, 2, 2, 5, 7))
+        >>> print(a.difference((2, 3, 5, 5, 8, 2)))
+        [1, 2, 7]
+        """
+        return self.__combine(other, True, False,
+                              lambda m, n: (n, m, 0, 0))
+
+
+    def symmetric_difference(self, other):
+        """Returns a new SortedList of the values in either this list
+        or other but not both; a value is in the result abs(m - n)
+        times
+
+        >>> a = SortedList((1, 2, 2, 2, 5, 7))
+        >>> print(a.symmetric_difference((2, 3, 5, 5, 8, 2)))
+        [1, 2, 3, 5, 7, 8]
+        """
+        return self.__combine(other, True, True,
+                              lambda m, n: (n, m, m, n))
+
+
+    def __combine(self, other, mine, theirs, equal):
+        """Returns a new SortedList combining this list and other:
+        mine and theirs say whether values whose keys only this list
+        or only other has are kept, and for keys both have, equal(m, n)
+        returns the (start, stop) slices of the m values from this
+        list and the n from other that are kept
+        """
+        if not (isinstance(other, SortedList) and other.key is self.key):
+            other = SortedList(other, self.key)
+        other.flush()
+        result = SortedList(key=self.key)
+        keyed = self.__keyed
+        chain = itertools.chain.from_iterable
+        a_values = list(chain(self.__lists))
+        a_keys = list(chain(self.__keys)) if keyed else a_values
+        b_values = list(chain(other.__lists))
+        b_keys = list(chain(other.__keys)) if keyed else b_values
+        values, keys = [], []
+        a_size, b_size = len(a_values), len(b_values)
+        i = j = 0
+        while i < a_size and j < b_size:
+            a_key, b_key = a_keys[i], b_keys[j]
+            if a_key < b_key:
+                stop = _gallop(a_keys, b_key, i)
+                if mine:
+                    values += a_values[i:stop]
+                    keys += a_keys[i:stop]
+                i = stop
+            elif b_key < a_key:
+                stop = _gallop(b_keys, a_key, j)
+                if theirs:
+                    values += b_values[j:stop]
+                    keys += b_keys[j:stop]
+                j = stop
+            else:
+                a_stop = _gallop(a_keys, a_key, i, True)
+                b_stop = _gallop(b_keys, b_key, j, True)
+                a_start, a_end, b_start, b_end = equal(a_stop - i,
+                                                       b_stop - j)
+                values += a_values[i + a_start:i + a_end]
+                keys += a_keys[i + a_start:i + a_end]
+                values += b_values[j + b_start:j + b_end]
+                keys += b_keys[j + b_start:j + b_end]
+                i, j = a_stop, b_stop
+        if mine:
+            values += a_values[i:]
+            keys += a_keys[i:]
+        if theirs:
+            values += b_values[j:]
+            keys += b_keys[j:]
+        result.__build(values, keys if keyed else None)
+        return result
+
+
     def __delitem__(self, index):
         """Deletes the value at the given index position
 
@@ -270,9 +1466,67 @@ class SortedList:
         >>> del L[-3:]
         >>> print(L)
         [-5, 0, 3]
+        >>> calls = []
+        >>> def key(x):
+        ...     calls.append(x)
+        ...     return -x
+        >>> L = SortedList(range(10), key)
+        >>> del L[::3]
+        >>> L[:], len(calls)
+        ([8, 7, 5, 4, 2, 1], 10)
         """
-        del self.__list[index]
-        
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.__len)
+            if step == 1 and start < stop:
+                self.__delete_range(start, stop)
+            elif len(range(start, stop, step)):
+                values = list(self)
+                del values[index]
+                keys = None
+                if self.__keyed:
+                    keys = list(itertools.chain.from_iterable(self.__keys))
+                    del keys[index]
+                self.__build(values, keys)
+            return
+        pos, idx = self.__locate(self.__normalize(
+                index, "list assignment index out of range"))
+        self.__delete(pos, idx)
+
+
+    def __delete_range(self, start, stop):
+        """Deletes the values from index position start up to
+        but excluding stop
+        """
+        if start == 0 and stop == self.__len:
+            self.__build([])
+            return
+        first, first_idx = self.__locate(start)
+        last, last_idx = self.__locate(stop - 1)
+        if not self.__plain:
+            self.__prepare(first, last)
+        for store in self.__stores():
+            if first == last:
+                del store[first][first_idx:last_idx + 1]
+            else:
+                del store[last][:last_idx + 1]
+                del store[first + 1:last]
+                del store[first][first_idx:]
+        maxes = self.__maxes
+        del maxes[first + 1:last]
+        self.__len -= stop - start
+        for pos in sorted({first, min(last, first + 1)}, reverse=True):
+            if self.__lists[pos]:
+                maxes[pos] = self.__keys[pos][-1]
+            else:
+                for store in self.__stores():
+                    del store[pos]
+                del maxes[pos]
+        self.__index = None
+        lists = self.__lists
+        if first < len(lists) and len(lists) > 1 and (
+                len(lists[first]) < _LOAD // 2):
+            self.__merge(first)
+
 
     def __getitem__(self, index):
         """Returns the value at the given index position
@@ -289,7 +1543,24 @@ class SortedList:
         >>> L[4:8]
         [3, 8, 8, 9]
         """
-        return self.__list[index]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.__len)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            pos, idx = self.__locate(start)
+            result = self.__lists[pos][idx:idx + stop - start]
+            for sublist in itertools.islice(self.__lists, pos + 1, None):
+                if len(result) >= stop - start:
+                    break
+                result.extend(sublist[:stop - start - len(result)])
+            return result
+        if not self.__len:
+            raise IndexError("list index out of range")
+        pos, idx = self.__locate(
+                self.__normalize(index, "list index out of range"))
+        return self.__lists[pos][idx]
 
 
     def __setitem__(self, index, value):
@@ -307,7 +1578,7 @@ class SortedList:
         >>> print(result)
         [-18, -1, 1, 2, 3, 3, 4, 5, 5, 7, 8, 22, 99]
         """
-        return iter(self.__list)
+        return itertools.chain.from_iterable(self.__lists)
 
 
     def __reversed__(self):
@@ -320,7 +1591,8 @@ class SortedList:
         >>> print(result)
         [99, 22, 8, 7, 5, 5, 4, 3, 3, 2, 1, -1, -18]
         """
-        return reversed(self.__list)
+        return itertools.chain.from_iterable(
+                map(reversed, reversed(self.__lists)))
 
 
     def __contains__(self, value):
@@ -334,9 +1606,7 @@ class SortedList:
         >>> 99 in L
         True
         """
-        index = self.__bisect_left(value)
-        return (index < len(self.__list) and
-                self.__list[index] == value)
+        return self.__find(value) is not None
 
 
     def __len__(self):
@@ -349,7 +1619,7 @@ class SortedList:
         >>> len(L)
         0
         """
-        return len(self.__list)
+        return self.__len
 
 
     def __str__(self):
@@ -366,11 +1636,14 @@ class SortedList:
         >>> str(L)
         "['brown', 'fox', 'jumped', 'quick', 'the']"
         """
-        return str(self.__list)
+        return str(list(self))
 
 
     def copy(self):
         """Returns a shallow copy of the list with the same key function
+
+        The copy shares the original's storage until either changes, and
+        then only the sublists that are changed are copied.
         >>> L = SortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3])
         >>> m = L.copy()
         >>> str(m)
@@ -382,10 +1655,89 @@ class SortedList:
         >>> str(n)
         '[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]'
         """
-        return SortedList(self, self.__key)
+        return SortedList(self, self.key)
         
     __copy__ = copy
 
+
+    def snapshot(self):
+        """Returns a read-only copy of the list
+
+        Like copy() this shares the list's storage, so it takes the
+        same time however long the list is.
+        >>> L = SortedList(range(5000))
+        >>> s = L.snapshot()
+        >>> L.remove_every(10)
+        1
+        >>> s.count(10), L.count(10), len(s)
+        (1, 0, 5000)
+        >>> s.add(1)
+        Traceback (most recent call last):
+        ...
+        TypeError: a SortedList snapshot is read-only
+        >>> t = s.copy()
+        >>> t.add(1)
+        >>> t.count(1), s.count(1)
+        (2, 1)
+        """
+        result = self.copy()
+        result.__frozen = True
+        return result
+
+
+    def __getstate__(self):
+        """Returns the sublists (and, with a key function, the cached
+        keys) so that unpickling restores them as they are, without
+        sorting or calling the key function, whether it is a read-only
+        snapshot, and the attributes that a subclass has added
+
+        >>> import pickle
+        >>> L = SortedList(["the", "Quick", "brown", "Fox"], key=str.lower)
+        >>> m = pickle.loads(pickle.dumps(L))
+        >>> print(m)
+        ['brown', 'Fox', 'Quick', 'the']
+        >>> m.key is str.lower, m.index("Quick")
+        (True, 2)
+        >>> print(pickle.loads(pickle.dumps(SortedList(range(3000, 0, -1))))[:3])
+        [1, 2, 3]
+        >>> import copy
+        >>> class Tagged(SortedList):
+        ...     pass
+        >>> t = Tagged((3, 1, 2))
+        >>> t.tag = "x"
+        >>> u = copy.deepcopy(t)
+        >>> type(u).__name__, u.tag, u[:]
+        ('Tagged', 'x', [1, 2, 3])
+        >>> s = pickle.loads(pickle.dumps(L.snapshot()))
+        >>> s.add("a")
+        Traceback (most recent call last):
+        ...
+        TypeError: a SortedList snapshot is read-only
+        """
+        attributes = {name: value for name, value in vars(self).items()
+                      if not name.startswith("_SortedList__")}
+        if self.__keyed:
+            return (self.__key_function, self.__lists, self.__keys,
+                    self.__frozen, attributes)
+        return None, self.__lists, None, self.__frozen, attributes
+
+
+    def __setstate__(self, state):
+        key, self.__lists, keys, frozen, attributes = state
+        self.__key = self.__key_function = key or _identity
+        self.__keyed = self.__key is not _identity
+        self.__stats = None
+        self.__keys = keys if self.__keyed else self.__lists
+        self.__maxes = [sublist[-1] for sublist in self.__keys]
+        self.__len = sum(map(len, self.__lists))
+        self.__index = None
+        self.__frozen = frozen
+        self.__private()
+        if frozen:
+            # so that changes go through __prepare(), which refuses them
+            self.__plain = False
+        vars(self).update(attributes)
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
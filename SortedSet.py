@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+"""A set that keeps its values in order
+
+A SortedSet pairs a set, which answers membership tests in O(1), with a
+SortedList, which answers order and rank queries. Values are unique by
+equality as in a set and ordered using < on the values or on the results
+of a key function as in a SortedList.
+
+The set operators produce their results in order without sorting: each
+side is filtered against the other's set in a single pass and the sorted
+results are merged.
+
+>>> s = SortedSet((5, 8, -1, 3, 4, 22, 5, 3))
+>>> print(s)
+[-1, 3, 4, 5, 8, 22]
+>>> 5 in s, 6 in s, s.index(8), s[-1]
+(True, False, 4, 22)
+>>> s.add(6)
+>>> s.discard(-1)
+>>> list(s.irange(4, 8))
+[4, 5, 6, 8]
+>>> print(s | SortedSet((1, 5, 30)))
+[1, 3, 4, 5, 6, 8, 22, 30]
+>>> print(s & {5, 8, 9}, s - {5, 8, 9}, s ^ {5, 8, 9})
+[5, 8] [3, 4, 6, 22] [3, 4, 6, 9, 22]
+>>> s <= SortedSet(range(100)), s == {3, 4, 5, 6, 8, 22}
+(True, True)
+"""
+
+import collections.abc
+import heapq
+import itertools
+
+from . import SortedList
+
+
+class SortedSet(collections.abc.MutableSet):
+
+    def __init__(self, iterable=None, key=None):
+        """Creates a SortedSet of the unique values from the iterable
+        that orders using < on the values, or on the results of using
+        the given key function
+
+        >>> s = SortedSet(("the", "Quick", "brown", "Fox", "the"),
+        ...               str.lower)
+        >>> print(s)
+        ['brown', 'Fox', 'Quick', 'the']
+        """
+        self.__set = set(iterable) if iterable is not None else set()
+        self.__list = SortedList.SortedList(self.__set, key)
+
+
+    @classmethod
+    def __from_sorted(cls, values, key):
+        """Returns a SortedSet of the given unique values which must
+        already be in order
+        """
+        result = cls(key=key)
+        result.__list = SortedList.SortedList.from_iterable(
+                values, key, assume_sorted=True)
+        result.__set = set(result.__list)
+        return result
+
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return cls(iterable)
+
+
+    @property
+    def key(self):
+        """Return the key function used by this set
+        """
+        key = self.__list.key
+        return None if key is SortedList._identity else key
+
+
+    def add(self, value):
+        """Adds a value to the set if it isn't already present
+        """
+        if value not in self.__set:
+            self.__set.add(value)
+            self.__list.add(value)
+
+
+    def update(self, *iterables):
+        """Adds the values from each of the iterables
+
+        >>> s = SortedSet((5, 8))
+        >>> s.update((1, 5), range(7, 10))
+        >>> print(s)
+        [1, 5, 7, 8, 9]
+        """
+        new_values = []
+        for value in itertools.chain.from_iterable(iterables):
+            if value not in self.__set:
+                self.__set.add(value)
+                new_values.append(value)
+        self.__list.update(new_values)
+
+
+    def discard(self, value):
+        """Removes value from the set if it is present
+        """
+        if value in self.__set:
+            self.__set.remove(value)
+            self.__list.remove(value)
+
+
+    def remove(self, value):
+        """Removes value from the set or raises KeyError if it isn't
+        present
+
+        >>> s = SortedSet((5, 8))
+        >>> s.remove(5)
+        >>> s.remove(5)
+        Traceback (most recent call last):
+        ...
+        KeyError: 5
+        """
+        if value not in self.__set:
+            raise KeyError(value)
+        self.discard(value)
+
+
+    def pop(self, index=-1):
+        """Removes and returns the value at index position index
+        (the last value by default)
+
+        >>> s = SortedSet((5, 8, -1))
+        >>> s.pop(), s.pop(0), list(s)
+        (8, -1, [5])
+        """
+        value = self.__list.pop(index)
+        self.__set.remove(value)
+        return value
+
+
+    def clear(self):
+        self.__set.clear()
+        self.__list.clear()
+
+
+    def __contains__(self, value):
+        return value in self.__set
+
+
+    def __len__(self):
+        return len(self.__set)
+
+
+    def __iter__(self):
+        return iter(self.__list)
+
+
+    def __reversed__(self):
+        return reversed(self.__list)
+
+
+    def __getitem__(self, index):
+        """Returns the value at the given index position, or a list
+        of the values for a slice
+        """
+        return self.__list[index]
+
+
+    def index(self, value):
+        """Returns the index position of value, that is, the number of
+        values that come before it, or raises ValueError if it isn't
+        present
+
+        >>> s = SortedSet((5, 8, -1, 3))
+        >>> s.index(5)
+        2
+        >>> s.index(4)
+        Traceback (most recent call last):
+        ...
+        ValueError: SortedSet.index(x): x not in set
+        """
+        if value not in self.__set:
+            raise ValueError("SortedSet.index(x): x not in set")
+        return self.__list.index(value)
+
+
+    def count(self, value):
+        return int(value in self.__set)
+
+
+    def bisect_left(self, value):
+        return self.__list.bisect_left(value)
+
+
+    def bisect_right(self, value):
+        return self.__list.bisect_right(value)
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the values from minimum to maximum;
+        the arguments are as for SortedList.irange()
+        """
+        return self.__list.irange(minimum, maximum, inclusive, reverse)
+
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the values from index position start
+        up to but excluding stop
+        """
+        return self.__list.islice(start, stop, reverse)
+
+
+    def __coerce(self, other):
+        """Returns other as a SortedSet with this set's key function
+        """
+        if isinstance(other, SortedSet) and other.key is self.key:
+            return other
+        return SortedSet(other, self.key)
+
+
+    @staticmethod
+    def __as_set(other):
+        """Returns other, or a set of its values if it isn't a set
+        """
+        if isinstance(other, collections.abc.Set):
+            return other
+        return set(other)
+
+
+    def __filtered(self, other, keep):
+        """Returns an iterator over this set's values in order that are
+        in the set other if keep is True, or not in it if keep is False
+        """
+        test = other.__contains__
+        if keep:
+            return filter(test, self.__list)
+        return itertools.filterfalse(test, self.__list)
+
+
+    def __merged(self, first, second):
+        """Returns a new SortedSet of the values of two iterators over
+        disjoint values in order
+        """
+        key = self.key
+        return self.__from_sorted(heapq.merge(first, second, key=key), key)
+
+
+    def union(self, *others):
+        """Returns a new SortedSet of the values in this set or in any
+        of the others
+
+        >>> s = SortedSet((5, 8, -1))
+        >>> print(s.union([3, 5], (22,)))
+        [-1, 3, 5, 8, 22]
+        """
+        result = self.copy()
+        for other in map(self.__coerce, others):
+            result = self.__merged(result, other.__filtered(result, False))
+        return result
+
+
+    def intersection(self, *others):
+        """Returns a new SortedSet of the values in this set and in all
+        of the others
+        """
+        result = self.copy()
+        for other in map(self.__as_set, others):
+            result = self.__from_sorted(result.__filtered(other, True),
+                                        self.key)
+        return result
+
+
+    def difference(self, *others):
+        """Returns a new SortedSet of the values in this set that aren't
+        in any of the others
+        """
+        result = self.copy()
+        for other in map(self.__as_set, others):
+            result = self.__from_sorted(result.__filtered(other, False),
+                                        self.key)
+        return result
+
+
+    def symmetric_difference(self, other):
+        """Returns a new SortedSet of the values in this set or in other
+        but not in both
+        """
+        other = self.__coerce(other)
+        return self.__merged(self.__filtered(other, False),
+                             other.__filtered(self, False))
+
+
+    def __or__(self, other):
+        if not isinstance(other, collections.abc.Set):
+            return NotImplemented
+        return self.union(other)
+
+
+    def __and__(self, other):
+        if not isinstance(other, collections.abc.Set):
+            return NotImplemented
+        return self.intersection(other)
+
+
+    def __sub__(self, other):
+        if not isinstance(other, collections.abc.Set):
+            return NotImplemented
+        return self.difference(other)
+
+
+    def __xor__(self, other):
+        if not isinstance(other, collections.abc.Set):
+            return NotImplemented
+        return self.symmetric_difference(other)
+
+
+    def copy(self):
+        """Returns a new SortedSet with the same values and key function
+
+        >>> s = SortedSet((5, 8, -1))
+        >>> t = s.copy()
+        >>> t.add(3)
+        >>> print(s, t)
+        [-1, 5, 8] [-1, 3, 5, 8]
+        """
+        result = SortedSet(key=self.key)
+        result.__set = self.__set.copy()
+        result.__list = self.__list.copy()
+        return result
+
+    __copy__ = copy
+
+
+    def __str__(self):
+        return str(self.__list)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
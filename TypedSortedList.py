@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+
+"""A SortedList of machine numbers kept in one contiguous array.array
+
+Every value is stored unboxed in the array's buffer (8 bytes for the
+default 'd' typecode instead of a pointer plus a float object), and the
+buffer can be handed to other code without copying through buffer() or,
+if NumPy is installed, as_numpy(). Batch operations use NumPy when it is
+available and fall back to the bisect module otherwise.
+
+>>> L = TypedSortedList((5, 8, -1, 3, 4, 22), "i")
+>>> L.add(5)
+>>> L.add(6)
+>>> list(L)
+[-1, 3, 4, 5, 5, 6, 8, 22]
+>>> L.index(5), L.count(5), 7 in L
+(3, 2, False)
+>>> L.typecode
+'i'
+>>> L.add(2.5)
+Traceback (most recent call last):
+...
+TypeError: 'float' object cannot be interpreted as an integer
+>>> L[2] = 18
+Traceback (most recent call last):
+...
+TypeError: use add() to insert a value and rely on the list to put it in the right place
+"""
+
+import array
+import itertools
+import pickle
+from bisect import bisect_left, bisect_right
+
+from . import SortedList
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_TYPECODES = "bBhHiIlLqQfd"
+
+
+class TypedSortedList:
+
+    def __init__(self, sequence=None, typecode="d"):
+        """Creates a TypedSortedList holding values of the given
+        array typecode ordered using <
+
+        >>> L = TypedSortedList()
+        >>> print(L)
+        []
+        >>> L = TypedSortedList((5, 8, -1, 3, 4, 22))
+        >>> print(L)
+        [-1.0, 3.0, 4.0, 5.0, 8.0, 22.0]
+        >>> L = TypedSortedList([300, 2], "B")
+        Traceback (most recent call last):
+        ...
+        OverflowError: unsigned byte integer is greater than maximum
+        >>> L = TypedSortedList([], "u")
+        Traceback (most recent call last):
+        ...
+        ValueError: TypedSortedList typecode must be one of bBhHiIlLqQfd
+        """
+        if typecode not in _TYPECODES:
+            raise ValueError("{0} typecode must be one of {1}".format(
+                             self.__class__.__name__, _TYPECODES))
+        if isinstance(sequence, TypedSortedList):
+            self.__array = array.array(typecode, sequence.__array)
+            if sequence.typecode != typecode:
+                self.__array = self.__sorted(self.__array)
+        else:
+            self.__array = self.__sorted(
+                    array.array(typecode, () if sequence is None
+                                else sequence))
+
+
+    @property
+    def typecode(self):
+        """Returns the array typecode of the values
+        """
+        return self.__array.typecode
+
+
+    def __sorted(self, values):
+        """Returns the array values sorted into a new array
+        """
+        if numpy is not None:
+            result = array.array(values.typecode)
+            result.frombytes(numpy.sort(self.__view(values)).tobytes())
+            return result
+        return array.array(values.typecode, sorted(values))
+
+
+    def __probe(self, value):
+        """Returns value as the list would store it, so that a stored
+        copy of it compares equal: with typecode 'f' values are rounded
+        to single precision
+
+        >>> L = TypedSortedList((0.1, 0.2, 0.1), "f")
+        >>> 0.1 in L, L.count(0.1), L.index(0.2), L.count_range(0.1, 0.2)
+        (True, 2, 2, 3)
+        >>> L.contains_many([0.2, 0.3]), L.count_many([0.1])
+        ([True, False], [2])
+        >>> L.remove(0.1)
+        >>> print(L)
+        [0.10000000149011612, 0.20000000298023224]
+        """
+        if self.__array.typecode == "f":
+            return array.array("f", (value,))[0]
+        return value
+
+
+    def __probes(self, values):
+        """Returns a list of the values as __probe() returns them
+        """
+        if self.__array.typecode == "f":
+            return array.array("f", values).tolist()
+        return list(values)
+
+
+    @staticmethod
+    def __view(values):
+        """Returns a NumPy array sharing the array values' buffer
+        """
+        return numpy.frombuffer(values, dtype=values.typecode)
+
+
+    def buffer(self):
+        """Returns a read-only memoryview of the sorted values without
+        copying them
+
+        The list cannot grow or shrink while the memoryview is alive,
+        so release() it (or let it go) before changing the list.
+        >>> L = TypedSortedList((5, 8, -1, 3, 4, 22), "q")
+        >>> view = L.buffer()
+        >>> view.format, view.nbytes, view[1]
+        ('q', 48, 3)
+        >>> L.add(1)
+        Traceback (most recent call last):
+        ...
+        BufferError: cannot resize an array that is exporting buffers
+        >>> view.release()
+        >>> L.add(1)
+        """
+        return memoryview(self.__array).toreadonly()
+
+
+    def as_numpy(self):
+        """Returns a read-only NumPy array sharing the sorted values'
+        buffer; requires NumPy
+        """
+        if numpy is None:
+            raise ImportError("as_numpy() requires NumPy")
+        view = self.__view(self.__array)
+        view.flags.writeable = False
+        return view
+
+
+    def clear(self):
+        """Clears the list
+
+        >>> L = TypedSortedList((5, 8, -1, 3, 4, 22))
+        >>> L.clear()
+        >>> print(L)
+        []
+        """
+        del self.__array[:]
+
+
+    def add(self, value):
+        """Adds a value to the list (duplicates are allowed)
+
+        >>> L = TypedSortedList((5, 8, -1, 3, 4, 22), "h")
+        >>> L.add(5)
+        >>> L.add(-18)
+        >>> L.add(99)
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 8, 22, 99]
+        """
+        value = self.__probe(value)
+        self.__array.insert(bisect_left(self.__array, value), value)
+
+
+    def update(self, iterable):
+        """Adds every value from the iterable to the list
+
+        >>> L = TypedSortedList((5, 8, -1, 3, 4, 22), "i")
+        >>> L.update([7, 5, -18])
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 7, 8, 22]
+        >>> L.add_many(range(0, 30, 6))
+        >>> print(L)
+        [-18, -1, 0, 3, 4, 5, 5, 6, 7, 8, 12, 18, 22, 24]
+        """
+        values = array.array(self.__array.typecode, iterable)
+        if SortedList._one_by_one(len(values), len(self.__array)):
+            for value in values:
+                self.add(value)
+        elif values:
+            values.extend(self.__array)
+            self.__array = self.__sorted(values)
+
+    add_many = update
+
+
+    def pop(self, index=-1):
+        """Removes and returns the item the given index
+
+        >>> L = TypedSortedList([-18, -1, 3, 4, 5, 99], "i")
+        >>> L.pop(), L.pop(0), L.pop(1)
+        (99, -18, 3)
+        >>> L.pop(12)
+        Traceback (most recent call last):
+        ...
+        IndexError: pop index out of range
+        """
+        return self.__array.pop(index)
+
+
+    def remove(self, value):
+        """Removes the first occurrence of value from the list
+
+        >>> L = TypedSortedList([-18, -1, 3, 4, 5, 5, 7], "i")
+        >>> L.remove(20)
+        Traceback (most recent call last):
+        ...
+        ValueError: TypedSortedList.remove(x): x not in list
+        >>> L.remove(5)
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 7]
+        """
+        value = self.__probe(value)
+        index = bisect_left(self.__array, value)
+        if index < len(self.__array) and self.__array[index] == value:
+            del self.__array[index]
+        else:
+            raise ValueError("{0}.remove(x): x not in list".format(
+                             self.__class__.__name__))
+
+
+    def remove_many(self, iterable):
+        """Removes one occurrence of each of the iterable's values
+
+        Nothing is removed if any of the values isn't in the list.
+        >>> L = TypedSortedList([-18, -1, 3, 4, 5, 5, 7, 5], "i")
+        >>> L.remove_many([5, -18, 5])
+        >>> print(L)
+        [-1, 3, 4, 5, 7]
+        >>> L.remove_many([3, 8])
+        Traceback (most recent call last):
+        ...
+        ValueError: TypedSortedList.remove_many(x): 8 not in list
+        >>> print(L)
+        [-1, 3, 4, 5, 7]
+        """
+        values = self.__sorted(array.array(self.__array.typecode, iterable))
+        doomed = []
+        index = end = 0
+        for value, run in itertools.groupby(values):
+            count = sum(1 for _ in run)
+            index = bisect_left(self.__array, value, end)
+            end = index + count
+            if (end > len(self.__array) or
+                    self.__array[end - 1] != value or
+                    self.__array[index] != value):
+                raise ValueError("{0}.remove_many(x): {1!r} not in "
+                                 "list".format(self.__class__.__name__,
+                                               value))
+            doomed.append((index, end))
+        if numpy is not None and len(doomed) > 1:
+            keep = numpy.ones(len(self.__array), dtype=bool)
+            for index, end in doomed:
+                keep[index:end] = False
+            result = array.array(self.__array.typecode)
+            result.frombytes(self.__view(self.__array)[keep].tobytes())
+            self.__array = result
+        else:
+            for index, end in reversed(doomed):
+                del self.__array[index:end]
+
+
+    def remove_every(self, value):
+        """Removes every occurrence of value from the list
+
+        Returns the number of occurrences removed (which could be 0).
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 5, 5, 7], "i")
+        >>> L.remove_every(-3), L.remove_every(7), L.remove_every(5)
+        (0, 1, 4)
+        >>> print(L)
+        [-18, -1, 3, 4]
+        """
+        value = self.__probe(value)
+        index = bisect_left(self.__array, value)
+        end = bisect_right(self.__array, value, index)
+        del self.__array[index:end]
+        return end - index
+
+
+    def count(self, value):
+        """Counts every occurrence of value in the list
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99])
+        >>> L.count(5), L.count(99), L.count(-17)
+        (4, 1, 0)
+        """
+        value = self.__probe(value)
+        index = bisect_left(self.__array, value)
+        return bisect_right(self.__array, value, index) - index
+
+
+    def __bisect_many(self, values, right=False):
+        """Returns the bisect_left() (or bisect_right()) index position
+        of each of the values
+
+        With NumPy this is a single searchsorted(); otherwise the
+        values are bisected in sorted order, each search starting where
+        the previous one ended.
+        """
+        if numpy is not None:
+            return numpy.searchsorted(self.__view(self.__array),
+                                      numpy.asarray(values),
+                                      "right" if right else "left").tolist()
+        bisect = bisect_right if right else bisect_left
+        result = [0] * len(values)
+        index = 0
+        for i in sorted(range(len(values)), key=values.__getitem__):
+            index = bisect(self.__array, values[i], index)
+            result[i] = index
+        return result
+
+
+    def contains_many(self, values):
+        """Returns a list saying for each of the values whether it is
+        in the list
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99], "i")
+        >>> L.contains_many([5, 0, 99, 100, -18, 2.5])
+        [True, False, True, False, True, False]
+        """
+        values = self.__probes(values)
+        size = len(self.__array)
+        return [index < size and self.__array[index] == value
+                for index, value in zip(self.__bisect_many(values), values)]
+
+
+    def index_many(self, values):
+        """Returns a list of the index position of the first occurrence
+        of each of the values, with None for those not in the list
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99], "i")
+        >>> L.index_many([5, 0, 99, -18])
+        [4, None, 9, 0]
+        """
+        values = self.__probes(values)
+        size = len(self.__array)
+        return [index if index < size and self.__array[index] == value
+                else None
+                for index, value in zip(self.__bisect_many(values), values)]
+
+
+    def count_many(self, values):
+        """Returns a list of the number of occurrences of each of the
+        values
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99], "i")
+        >>> L.count_many([5, 0, 3, 99])
+        [2, 0, 1, 1]
+        """
+        values = self.__probes(values)
+        return [stop - start for start, stop in zip(
+                self.__bisect_many(values),
+                self.__bisect_many(values, right=True))]
+
+
+    def count_range(self, minimum=None, maximum=None,
+                    inclusive=(True, True)):
+        """Counts the values from minimum to maximum; the arguments
+        are as for SortedList.irange()
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99])
+        >>> L.count_range(3, 7), L.count_range(3, 7, (False, False))
+        (7, 5)
+        """
+        start, stop = self.__span(minimum, maximum, inclusive)
+        return max(stop - start, 0)
+
+
+    def index(self, value):
+        """Returns the index position of the first occurrence of value
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99])
+        >>> L.index(5)
+        4
+        >>> L.index(0)
+        Traceback (most recent call last):
+        ...
+        ValueError: TypedSortedList.index(x): x not in list
+        """
+        value = self.__probe(value)
+        index = bisect_left(self.__array, value)
+        if index < len(self.__array) and self.__array[index] == value:
+            return index
+        raise ValueError("{0}.index(x): x not in list".format(
+                         self.__class__.__name__))
+
+
+    def bisect_left(self, value):
+        """Returns the index position of the first value not less
+        than value
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99])
+        >>> L.bisect_left(5), L.bisect_left(6), L.bisect_left(100)
+        (4, 6, 10)
+        """
+        return bisect_left(self.__array, self.__probe(value))
+
+
+    def bisect_right(self, value):
+        """Returns the index position just past the last value not
+        greater than value
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99])
+        >>> L.bisect_right(5), L.bisect_right(6), L.bisect_right(-20)
+        (6, 6, 0)
+        """
+        return bisect_right(self.__array, self.__probe(value))
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True),
+               reverse=False):
+        """Returns an iterator over the values from minimum to maximum;
+        the arguments are as for SortedList.irange()
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99], "i")
+        >>> list(L.irange(3, 7))
+        [3, 4, 5, 5, 7]
+        >>> list(L.irange(maximum=3, inclusive=(True, False), reverse=True))
+        [-1, -18]
+        """
+        start, stop = self.__span(minimum, maximum, inclusive)
+        return self.islice(start, max(start, stop), reverse)
+
+
+    def __span(self, minimum, maximum, inclusive):
+        """Returns the index positions of the first value in the range
+        and of the position just past the last one
+        """
+        values = self.__array
+        if minimum is not None:
+            minimum = self.__probe(minimum)
+        if maximum is not None:
+            maximum = self.__probe(maximum)
+        if minimum is None:
+            start = 0
+        elif inclusive[0]:
+            start = bisect_left(values, minimum)
+        else:
+            start = bisect_right(values, minimum)
+        if maximum is None:
+            stop = len(values)
+        elif inclusive[1]:
+            stop = bisect_right(values, maximum)
+        else:
+            stop = bisect_left(values, maximum)
+        return start, stop
+
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """Returns an iterator over the values from index position start
+        up to but excluding stop
+
+        >>> L = TypedSortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99], "i")
+        >>> list(L.islice(2, 6)), list(L.islice(-2, reverse=True))
+        ([3, 4, 5, 5], [99, 22])
+        """
+        positions = range(*slice(start, stop).indices(len(self.__array)))
+        if reverse:
+            positions = reversed(positions)
+        return map(self.__array.__getitem__, positions)
+
+
+    def __delitem__(self, index):
+        """Deletes the value or slice of values at the given index
+
+        >>> L = TypedSortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], "i")
+        >>> del L[0]
+        >>> del L[-3:]
+        >>> print(L)
+        [-5, 0, 3, 3, 8]
+        """
+        del self.__array[index]
+
+
+    def __getitem__(self, index):
+        """Returns the value at the given index position, or an array
+        of the values for a slice
+
+        >>> L = TypedSortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], "i")
+        >>> L[0], L[-1]
+        (-7, 14)
+        >>> L[4:8]
+        array('i', [3, 8, 8, 9])
+        """
+        return self.__array[index]
+
+
+    def __setitem__(self, index, value):
+        raise TypeError("use add() to insert a value and rely on "
+                        "the list to put it in the right place")
+
+
+    def __iter__(self):
+        return iter(self.__array)
+
+
+    def __reversed__(self):
+        return reversed(self.__array)
+
+
+    def __contains__(self, value):
+        value = self.__probe(value)
+        index = bisect_left(self.__array, value)
+        return index < len(self.__array) and self.__array[index] == value
+
+
+    def __len__(self):
+        return len(self.__array)
+
+
+    def __str__(self):
+        return str(self.__array.tolist())
+
+
+    def copy(self):
+        """Returns a copy of the list
+
+        >>> L = TypedSortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3], "i")
+        >>> m = L.copy()
+        >>> m.add(5)
+        >>> str(m), len(L)
+        ('[-9, -1, 1, 2, 3, 3, 4, 5, 7, 8, 22]', 10)
+        """
+        return TypedSortedList(self, self.__array.typecode)
+
+    __copy__ = copy
+
+
+    def __reduce_ex__(self, protocol):
+        """Pickles the values as the raw bytes of the array
+
+        With protocol 5 the array's buffer is passed as a PickleBuffer,
+        so a buffer_callback can send it out-of-band without copying.
+        >>> import pickle
+        >>> L = TypedSortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3])
+        >>> buffers = []
+        >>> data = pickle.dumps(L, protocol=5, buffer_callback=buffers.append)
+        >>> len(buffers), buffers[0].raw().nbytes
+        (1, 80)
+        >>> print(pickle.loads(data, buffers=buffers))
+        [-9.0, -1.0, 1.0, 2.0, 3.0, 3.0, 4.0, 7.0, 8.0, 22.0]
+        >>> print(pickle.loads(pickle.dumps(L, protocol=2))[:3])
+        array('d', [-9.0, -1.0, 1.0])
+        """
+        if protocol >= 5:
+            data = pickle.PickleBuffer(self.__array)
+        else:
+            data = self.__array.tobytes()
+        return self.__class__, (None, self.__array.typecode), data
+
+
+    def __setstate__(self, data):
+        values = array.array(self.__array.typecode)
+        values.frombytes(memoryview(data).cast("B"))
+        self.__array = values
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
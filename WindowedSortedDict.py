@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""A SortedDict that only keeps a window of its most recent keys
+
+A WindowedSortedDict is meant for items keyed by time. After every
+change that adds items it evicts the oldest ones so that at most
+max_len remain and, if ttl is given, none has a key older than ttl
+before the newest key (or before clock() if a clock function is given).
+Evicted items are removed from the front of the key index in one slice
+deletion and passed as a list of (key, value) pairs to on_evict.
+
+>>> evicted = []
+>>> d = WindowedSortedDict(ttl=10, on_evict=evicted.extend)
+>>> for t in (100, 103, 104, 108, 112):
+...     d[t] = "event {0}".format(t)
+>>> list(d), evicted
+([103, 104, 108, 112], [(100, 'event 100')])
+>>> d[120] = "event 120"
+>>> list(d), [t for t, _ in evicted]
+([112, 120], [100, 103, 104, 108])
+>>> d = WindowedSortedDict({t: t for t in range(10)}, max_len=3)
+>>> d.update({10: 10, 4: 4})
+>>> list(d.items())
+[(8, 8), (9, 9), (10, 10)]
+"""
+
+from . import SortedDict
+
+
+class WindowedSortedDict(SortedDict.SortedDict):
+
+    def __init__(self, dictionary=None, key=None, max_len=None, ttl=None,
+                 clock=None, on_evict=None, **kwargs):
+        """Initializes as SortedDict does and then evicts the items
+        outside the window
+
+        max_len is the largest number of items kept; ttl the greatest
+        age of a key kept, measured from the newest key or, if clock is
+        given, from what clock() returns, so keys must be numbers such
+        as timestamps; on_evict, if given, is called with a list of the
+        (key, value) pairs each eviction removes.
+        """
+        super().__init__(dictionary, key, **kwargs)
+        self.__key = key
+        self.__max_len = max_len
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__on_evict = on_evict
+        self.evict()
+
+
+    def evict(self):
+        """Evicts the items outside the window and returns them as a list
+        of (key, value) pairs in key order
+
+        Changes that add items call this; call it directly to apply a
+        ttl measured by clock() while no items are being added.
+        >>> now = [0]
+        >>> d = WindowedSortedDict(ttl=5, clock=lambda: now[0])
+        >>> d.update({1: "a", 3: "b", 4: "c"})
+        >>> now[0] = 9
+        >>> d.evict()
+        [(1, 'a'), (3, 'b')]
+        """
+        evicted = []
+        if self.__ttl is not None and self:
+            if self.__clock is None:
+                newest = self.peekitem(-1)[0]
+            else:
+                newest = self.__clock()
+            evicted = self.evict_before(newest - self.__ttl)
+        if self.__max_len is not None and len(self) > self.__max_len:
+            stop = len(self) - self.__max_len
+            evicted.extend(self.islice_items(0, stop))
+            self.del_islice(0, stop)
+        if evicted and self.__on_evict is not None:
+            self.__on_evict(evicted)
+        return evicted
+
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.evict()
+
+
+    def setdefault(self, key, value=None):
+        value = super().setdefault(key, value)
+        self.evict()
+        return value
+
+
+    def update(self, dictionary=None, **kwargs):
+        super().update(dictionary, **kwargs)
+        self.evict()
+
+
+    @classmethod
+    def from_iterable(cls, items, key=None, workers=None,
+                      assume_sorted=False, max_len=None, ttl=None,
+                      clock=None, on_evict=None):
+        """Returns a WindowedSortedDict of the items as
+        SortedDict.from_iterable() does, taking over the sorted key
+        index it builds, and then evicts the items outside the window
+
+        >>> d = WindowedSortedDict.from_iterable(
+        ...         ((t, -t) for t in range(3000, 0, -1)), workers=2,
+        ...         max_len=3)
+        >>> list(d.items())
+        [(2998, -2998), (2999, -2999), (3000, -3000)]
+        """
+        result = cls(key=key, max_len=max_len, ttl=ttl, clock=clock,
+                     on_evict=on_evict)
+        result.__setstate__(SortedDict.SortedDict.from_iterable(
+                items, key, workers, assume_sorted).__reduce__()[2])
+        result.evict()
+        return result
+
+
+    def copy(self):
+        """Returns a shallow copy with the same key function and window,
+        sharing the key index as SortedDict.copy() does
+
+        >>> d = WindowedSortedDict({1: "a", 2: "b"}, max_len=2)
+        >>> e = d.copy()
+        >>> e[3] = "c"
+        >>> list(d), list(e)
+        ([1, 2], [2, 3])
+        """
+        keys, values, _ = super().__reduce__()[2]
+        result = self.__class__(key=self.__key, max_len=self.__max_len,
+                                ttl=self.__ttl, clock=self.__clock,
+                                on_evict=self.__on_evict)
+        result.__setstate__((keys.copy(), values, {}))
+        return result
+
+    __copy__ = copy
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
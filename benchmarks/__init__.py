@@ -0,0 +1,8 @@
+"""Benchmarks for the sorted containers
+
+Run them with python -m tema.benchmarks; --help lists the options. Each
+result gives the operations per second and the peak memory allocated
+while an operation ran, for one container ("engine"), size, key
+function and input distribution, and all the results are written as
+JSON so that runs from different commits can be compared.
+"""
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""
+python -m tema.benchmarks [--sizes=1e3,1e4,1e5] [--output=results.json]
+
+Times each operation on every combination of engine, size, key function
+and input distribution and writes the results as JSON. An operation is
+timed on a freshly built container, and the best of --repeat runs is
+kept; a separate run under tracemalloc records the peak memory it
+allocated. Adding an engine means adding a builder and its operations
+to ENGINES.
+"""
+
+import argparse
+import collections
+import json
+import operator
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .. import SortedDict, SortedList, SortedSet, TypedSortedList
+
+
+def _consume(iterator):
+    collections.deque(iterator, maxlen=0)
+
+
+# Each operation is a function of the container and the probes that
+# returns the number of operations it did; building is timed separately
+
+def _add(container, probes):
+    _consume(map(container.add, probes))
+    return len(probes)
+
+
+def _remove(container, probes):
+    _consume(map(container.remove, probes))
+    return len(probes)
+
+
+def _contains(container, probes):
+    _consume(map(container.__contains__, probes))
+    return len(probes)
+
+
+def _index(container, probes):
+    _consume(map(container.index, probes))
+    return len(probes)
+
+
+def _iteration(container, probes):
+    _consume(iter(container))
+    return len(container)
+
+
+def _update(container, probes):
+    container.update(probes)
+    return len(probes)
+
+
+def _copy(container, probes):
+    container.copy()
+    return 1
+
+
+def _set_items(container, probes):
+    _consume(map(container.__setitem__, probes, probes))
+    return len(probes)
+
+
+def _delete_items(container, probes):
+    _consume(map(container.__delitem__, probes))
+    return len(probes)
+
+
+def _update_items(container, probes):
+    container.update(dict.fromkeys(probes, 0))
+    return len(probes)
+
+
+_SEQUENCE_OPERATIONS = {"build": None, "add": _add, "remove": _remove,
+                        "contains": _contains, "index": _index,
+                        "iteration": _iteration, "update": _update,
+                        "copy": _copy}
+
+_MAPPING_OPERATIONS = dict(_SEQUENCE_OPERATIONS, add=_set_items,
+                           remove=_delete_items, update=_update_items)
+
+# name -> (builder taking the values and the key function or None,
+#          operations, whether values are unique, whether key is supported)
+ENGINES = {
+    "SortedList": (SortedList.SortedList, _SEQUENCE_OPERATIONS, False, True),
+    "SortedDict": (lambda values, key: SortedDict.SortedDict(
+                       dict.fromkeys(values, 0), key),
+                   _MAPPING_OPERATIONS, True, True),
+    "SortedSet": (SortedSet.SortedSet, _SEQUENCE_OPERATIONS, True, True),
+    "TypedSortedList": (lambda values, key: TypedSortedList.TypedSortedList(
+                            values, "q"),
+                        _SEQUENCE_OPERATIONS, False, False),
+}
+
+KEYS = {"none": None, "neg": operator.neg}
+
+DISTRIBUTIONS = ("random", "sorted", "duplicates")
+
+
+def generate(distribution, size, count, rng, start=0):
+    """Returns count values drawn as for a container of size values;
+    start is where sorted values begin
+    """
+    if distribution == "random":
+        return [rng.randrange(size * 10) for _ in range(count)]
+    if distribution == "sorted":
+        return list(range(start, start + count))
+    if distribution == "duplicates":
+        return [rng.randrange(max(size // 100, 1)) for _ in range(count)]
+    raise ValueError("unknown distribution: {0}".format(distribution))
+
+
+def probes_for(operation, values, unique, distribution, size, count, rng):
+    """Returns the probes an operation is given: values present in the
+    container for remove, contains and index, and new values otherwise
+    """
+    if operation in ("remove", "contains", "index"):
+        present = list(set(values)) if unique else values
+        return rng.sample(present, min(count, len(present)))
+    if operation in ("add", "update"):
+        return generate(distribution, size, count, rng, start=size)
+    return []
+
+
+def measure(engine, operation, values, key, probes, repeat, memory):
+    """Returns (operations, best seconds, peak bytes or None)
+    """
+    build, operations, _, _ = ENGINES[engine]
+    run = operations[operation]
+    best = None
+    for _ in range(repeat):
+        if operation == "build":
+            start = time.perf_counter()
+            build(values, key)
+            seconds = time.perf_counter() - start
+            done = len(values)
+        else:
+            container = build(values, key)
+            start = time.perf_counter()
+            done = run(container, probes)
+            seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    peak = None
+    if memory:
+        container = None if operation == "build" else build(values, key)
+        tracemalloc.start()
+        try:
+            if operation == "build":
+                container = build(values, key)
+            else:
+                run(container, probes)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return done, best, peak
+
+
+def benchmark(args):
+    rng = random.Random(args.seed)
+    results = []
+    for size in args.sizes:
+        for distribution in args.distributions:
+            values = generate(distribution, size, size, rng)
+            for engine in args.engines:
+                _, _, unique, keyed = ENGINES[engine]
+                for key_name in args.keys:
+                    if KEYS[key_name] is not None and not keyed:
+                        continue
+                    for operation in args.operations:
+                        probes = probes_for(operation, values, unique,
+                                            distribution, size, args.ops, rng)
+                        done, seconds, peak = measure(
+                                engine, operation, values, KEYS[key_name],
+                                probes, args.repeat, args.memory)
+                        result = dict(engine=engine, size=size,
+                                      key=key_name, distribution=distribution,
+                                      operation=operation, ops=done,
+                                      seconds=seconds,
+                                      ops_per_sec=(done / seconds
+                                                   if seconds else None),
+                                      peak_bytes=peak)
+                        results.append(result)
+                        if args.verbose:
+                            print("{engine} n={size} key={key} "
+                                  "{distribution} {operation}: "
+                                  "{ops_per_sec:,.0f} ops/s".format(**result),
+                                  file=sys.stderr)
+    return dict(python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(),
+                parameters=dict(sizes=args.sizes, ops=args.ops,
+                                repeat=args.repeat, seed=args.seed),
+                results=results)
+
+
+def _choices(choices):
+    """Returns an argparse type for comma-separated names from choices
+    """
+    def parse(text):
+        names = text.split(",")
+        for name in names:
+            if name not in choices:
+                raise argparse.ArgumentTypeError(
+                        "invalid choice: {0!r} (choose from {1})".format(
+                        name, ", ".join(choices)))
+        return names
+    return parse
+
+
+def _sizes(text):
+    return [int(float(size)) for size in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            prog="python -m tema.benchmarks",
+            description="Benchmarks the sorted containers and writes the "
+                        "results as JSON")
+    parser.add_argument("--sizes", type=_sizes, default=[1000, 10000, 100000],
+                        help="comma-separated container sizes, e.g. 1e3,1e7")
+    parser.add_argument("--engines", type=_choices(ENGINES),
+                        default=list(ENGINES))
+    parser.add_argument("--operations",
+                        type=_choices(_SEQUENCE_OPERATIONS),
+                        default=list(_SEQUENCE_OPERATIONS))
+    parser.add_argument("--keys", type=_choices(KEYS), default=list(KEYS),
+                        help="key functions: none is the identity")
+    parser.add_argument("--distributions", type=_choices(DISTRIBUTIONS),
+                        default=list(DISTRIBUTIONS))
+    parser.add_argument("--ops", type=int, default=10000,
+                        help="operations per timed run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per case; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the tracemalloc runs")
+    parser.add_argument("-o", "--output", type=argparse.FileType("w"),
+                        default=sys.stdout)
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print each result to stderr as it is made")
+    args = parser.parse_args(argv)
+    json.dump(benchmark(args), args.output, indent=2)
+    args.output.write("\n")
+
+
+if __name__ == "__main__":
+    main()